@@ -4,9 +4,17 @@ import { StdioServerTransport } from "@modelcontextprotocol/sdk/server/stdio.js"
 import { ListToolsRequestSchema, CallToolRequestSchema } from "@modelcontextprotocol/sdk/types.js";
 import { spawn } from 'child_process';
 import path from 'path';
+import readline from 'readline';
 import { fileURLToPath } from 'url';
 
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
+const PYTHON = process.env.PYINTERP_PYTHON || 'python';
+// Set PYINTERP_POOL=0 to spawn a fresh interpreter per call, as before
+const POOL_ENABLED = process.env.PYINTERP_POOL !== '0';
+// Matches worker_pool.py's default run timeout
+const DEFAULT_TIMEOUT_SECONDS = 60;
+// Extra time for starting a worker or waiting for a free one before a pool request is abandoned
+const POOL_GRACE_SECONDS = 120;
 
 const server = new Server({
     name: "python-interpreter",
@@ -32,6 +40,18 @@ server.setRequestHandler(ListToolsRequestSchema, async () => ({
                     type: "string",
                     description: "Virtual environment name (optional)",
                     default: "default"
+                },
+                session: {
+                    type: "string",
+                    description: "Session name; variables and imports persist between calls with the same session (optional)"
+                },
+                end_session: {
+                    type: "boolean",
+                    description: "End the named session and discard its state; code is ignored (optional)"
+                },
+                timeout: {
+                    type: "number",
+                    description: "Seconds before execution is stopped (optional, default 60)"
                 }
             },
             required: ["code"]
@@ -39,20 +59,95 @@ server.setRequestHandler(ListToolsRequestSchema, async () => ({
     }]
 }));
 
-server.setRequestHandler(CallToolRequestSchema, async (request) => {
-    if (request.params.name !== "python-interpreter") {
-        throw new Error(`Unknown tool: ${request.params.name}`);
+// Warm worker pool (worker_pool.py), started on first use
+let pool = null;
+let poolDisabled = !POOL_ENABLED;
+let nextRequestId = 1;
+const pending = new Map();
+
+function startPool() {
+    const child = spawn(PYTHON, [
+        path.join(__dirname, 'worker_pool.py'), 'serve',
+        '--venvs-dir', path.join(__dirname, '.venvs')
+    ], { stdio: ['pipe', 'pipe', 'inherit'] });
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => {
+        let response;
+        try {
+            response = JSON.parse(line);
+        } catch {
+            return;
+        }
+        if (response.ready) {
+            child.ready = true;
+            return;
+        }
+        const request = pending.get(response.id);
+        if (request) {
+            pending.delete(response.id);
+            request.resolve(response);
+        }
+    });
+
+    const fail = (error) => {
+        if (pool === child) {
+            pool = null;
+        }
+        for (const request of pending.values()) {
+            request.reject(error);
+        }
+        pending.clear();
+    };
+    child.on('error', (error) => {
+        // Python couldn't be started at all; stop trying
+        poolDisabled = true;
+        fail(Object.assign(error, { notSent: true }));
+    });
+    // Before its ready line the pool hadn't read any request
+    child.on('exit', (code) => fail(Object.assign(new Error(`worker pool exited with code ${code}`),
+        { notSent: !child.ready })));
+    child.stdin.on('error', () => {});
+    return child;
+}
+
+function runInPool(args) {
+    if (!pool) {
+        pool = startPool();
     }
+    const child = pool;
+    return new Promise((resolve, reject) => {
+        const id = nextRequestId++;
+        const seconds = (args.timeout || DEFAULT_TIMEOUT_SECONDS) + POOL_GRACE_SECONDS;
+        // The code may still be running in the pool, so this is an error rather than a cold retry
+        const timer = setTimeout(() => {
+            if (pending.delete(id)) {
+                resolve({ ok: false, stdout: '', stderr: `No response from the worker pool after ${seconds}s` });
+            }
+        }, seconds * 1000);
+        pending.set(id, {
+            resolve: (response) => { clearTimeout(timer); resolve(response); },
+            reject: (error) => { clearTimeout(timer); reject(error); }
+        });
+        child.stdin.write(JSON.stringify({ id, ...args }) + '\n', (error) => {
+            // The pool had already exited, so it never read the request
+            if (error && pending.has(id)) {
+                pending.get(id).reject(Object.assign(error, { notSent: true }));
+                pending.delete(id);
+            }
+        });
+    });
+}
 
-    const { code, venv = "default" } = request.params.arguments;
+function runCold(code, venv) {
     const venvPath = path.join(__dirname, '.venvs', venv);
+    const binPath = process.platform === 'win32' ? path.join(venvPath, 'Scripts') : path.join(venvPath, 'bin');
 
-    return new Promise((resolve, reject) => {
-        const pythonProcess = spawn('python', ['-c', code], {
+    return new Promise((resolve) => {
+        const pythonProcess = spawn(PYTHON, ['-c', code], {
             env: {
                 ...process.env,
                 VIRTUAL_ENV: venvPath,
-                PATH: `${venvPath}\\Scripts;${process.env.PATH}`
+                PATH: `${binPath}${path.delimiter}${process.env.PATH}`
             }
         });
 
@@ -67,25 +162,58 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
             stderr += data.toString();
         });
 
+        pythonProcess.on('error', (error) => {
+            resolve({ ok: false, stdout, stderr: error.message });
+        });
+
         pythonProcess.on('close', (code) => {
-            if (code !== 0) {
-                resolve({
-                    content: [{
-                        type: "text",
-                        text: `Error: ${stderr}`
-                    }],
-                    isError: true
-                });
-            } else {
-                resolve({
-                    content: [{
-                        type: "text",
-                        text: stdout
-                    }]
-                });
-            }
+            resolve({ ok: code === 0, stdout, stderr });
         });
     });
+}
+
+server.setRequestHandler(CallToolRequestSchema, async (request) => {
+    if (request.params.name !== "python-interpreter") {
+        throw new Error(`Unknown tool: ${request.params.name}`);
+    }
+
+    const { code, venv = "default", session, end_session, timeout } = request.params.arguments;
+    let result;
+    if (poolDisabled) {
+        if (session) {
+            throw new Error("Sessions need the worker pool, which is unavailable");
+        }
+        result = await runCold(code, venv);
+    } else {
+        try {
+            result = await runInPool({ code, venv, session, end_session, timeout });
+        } catch (error) {
+            // A session's state died with the pool
+            if (session) {
+                throw error;
+            }
+            // Code the pool received may have run, fully or partly, before it died; running it
+            // again would repeat its side effects, so only a request that never got there runs cold
+            result = error.notSent ? await runCold(code, venv)
+                : { ok: false, stdout: '', stderr: `${error.message}; the code may have run and was not retried` };
+        }
+    }
+
+    if (!result.ok) {
+        return {
+            content: [{
+                type: "text",
+                text: `Error: ${result.stderr}`
+            }],
+            isError: true
+        };
+    }
+    return {
+        content: [{
+            type: "text",
+            text: result.stdout
+        }]
+    };
 });
 
 async function runServer() {
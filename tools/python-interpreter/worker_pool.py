@@ -0,0 +1,451 @@
+#!/usr/bin/env python
+"""Warm Python worker pool for the python-interpreter tool.
+
+`serve` runs the manager: it reads JSON requests, one per line, on stdin
+({"id", "code", "venv", "session", "end_session", "timeout"}) and writes one
+JSON response per line ({"id", "ok", "stdout", "stderr"}). For each venv it
+keeps interpreters that have already imported the --preload modules, so a
+request only pays for running its code. Requests with a "session" run in a
+dedicated interpreter whose globals persist until the session ends.
+
+`benchmark` compares a cold `python -c` spawn with a warm worker.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import queue
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEFAULT_PRELOAD = 'numpy,pandas'
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_RUNS = 100
+DEFAULT_MAX_RSS_MB = 512
+DEFAULT_TIMEOUT = 60.0
+SESSION_IDLE_SECONDS = 600
+STARTUP_TIMEOUT = 60.0
+
+# --- Worker side -----------------------------------------------------------
+
+def current_rss() -> int:
+    """Resident set size in bytes, or 0 where it can't be read cheaply."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return 0
+
+def preload_modules(names):
+    loaded, failed = [], []
+    for name in names:
+        try:
+            __import__(name)
+            loaded.append(name)
+        except Exception:
+            failed.append(name)
+    return loaded, failed
+
+def execute(code: str, namespace: dict):
+    """Run code in namespace, capturing its output the way `python -c` would report it."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    ok = True
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            exec(compile(code, '<string>', 'exec'), namespace)
+        except SystemExit as e:
+            ok = e.code in (None, 0)
+            if not ok and not isinstance(e.code, int):
+                print(e.code, file=sys.stderr)
+        except BaseException as e:
+            ok = False
+            # Skip this function's frame so the traceback starts in the user's code
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+    return ok, stdout.getvalue(), stderr.getvalue()
+
+def _drain(capture) -> str:
+    """Return and discard what was written to fd 1 (os.system, subprocesses, C code) since the last call."""
+    sys.__stdout__.flush()
+    capture.seek(0)
+    data = capture.read()
+    capture.seek(0)
+    capture.truncate()
+    return data.decode('utf-8', 'replace')
+
+def worker_main(preload, session: bool) -> None:
+    requests = sys.stdin
+    # Replies go over a private copy of fd 1. fd 1 itself is pointed at a scratch
+    # file, so output written straight to it can't be mistaken for a reply.
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    capture = tempfile.TemporaryFile()
+    os.dup2(capture.fileno(), sys.stdout.fileno())
+    # User code must not read or write the protocol streams
+    sys.stdin = io.StringIO()
+    loaded, failed = preload_modules(preload)
+    _drain(capture)
+    responses.write(json.dumps({'ready': True, 'preloaded': loaded, 'failed': failed}) + '\n')
+    responses.flush()
+
+    home = os.getcwd()
+    session_namespace = {'__name__': '__main__', '__builtins__': __builtins__}
+    for line in requests:
+        request = json.loads(line)
+        namespace = session_namespace if session else {'__name__': '__main__', '__builtins__': __builtins__}
+        ok, out, err = execute(request['code'], namespace)
+        # Like `python -c` into a pipe, where print() is buffered until exit, fd output comes first
+        out = _drain(capture) + out
+        if not session:
+            os.chdir(home)
+        responses.write(json.dumps({'id': request.get('id'), 'ok': ok, 'stdout': out, 'stderr': err,
+                                    'rss': current_rss()}) + '\n')
+        responses.flush()
+
+# --- Manager side ----------------------------------------------------------
+
+def venv_python(venvs_dir: Path, venv: str) -> str:
+    """The venv's interpreter, or this interpreter when the venv doesn't exist."""
+    for candidate in (venvs_dir / venv / 'Scripts' / 'python.exe', venvs_dir / venv / 'bin' / 'python'):
+        if candidate.exists():
+            return str(candidate)
+    return sys.executable
+
+class WorkerError(Exception):
+    pass
+
+class Worker:
+    """One interpreter running worker_main, driven over its stdin/stdout."""
+
+    def __init__(self, python: str, preload, session: bool = False):
+        command = [python, '-u', os.path.abspath(__file__), 'worker', '--preload', ','.join(preload)]
+        if session:
+            command.append('--session')
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, encoding='utf-8', bufsize=1)
+        self.responses = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+        self.runs = 0
+        self.rss = 0
+        self.last_used = time.monotonic()
+        try:
+            hello = self.responses.get(timeout=STARTUP_TIMEOUT)
+        except queue.Empty:
+            hello = None
+        if not hello or not hello.get('ready'):
+            self.kill()
+            raise WorkerError(f"Worker for {python} failed to start")
+        self.preloaded = hello['preloaded']
+
+    def _read(self) -> None:
+        for line in self.process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(message, dict):
+                self.responses.put(message)
+        self.responses.put(None)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, code: str, timeout: float) -> dict:
+        self.last_used = time.monotonic()
+        self.runs += 1
+        run_id = self.runs
+        deadline = time.monotonic() + timeout
+        try:
+            self.process.stdin.write(json.dumps({'id': run_id, 'code': code}) + '\n')
+            self.process.stdin.flush()
+            # A reply for another run would hand one caller another's output; skip it
+            response = self.responses.get(timeout=timeout)
+            while response is not None and response.get('id') != run_id:
+                response = self.responses.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            self.kill()
+            return {'ok': False, 'stdout': '', 'stderr': f"Execution timed out after {timeout:g}s"}
+        except OSError:
+            response = None
+        if response is None:
+            self.kill()
+            return {'ok': False, 'stdout': '', 'stderr': f"Worker exited with code {self.process.poll()}"}
+        response.pop('id', None)
+        self.rss = response.pop('rss', 0)
+        return response
+
+    def kill(self) -> None:
+        if self.alive:
+            self.process.kill()
+        self.process.wait()
+
+class VenvPool:
+    """Up to `size` warm workers for one interpreter, recycled after max_runs or above max_rss."""
+
+    def __init__(self, python: str, preload, size: int = DEFAULT_POOL_SIZE, max_runs: int = DEFAULT_MAX_RUNS,
+                 max_rss: int = DEFAULT_MAX_RSS_MB * 1024 * 1024):
+        self.python = python
+        self.preload = preload
+        self.size = size
+        self.max_runs = max_runs
+        self.max_rss = max_rss
+        self.idle = []
+        self.total = 0
+        self.cond = threading.Condition()
+        self.recycled = 0
+
+    def prewarm(self) -> None:
+        with self.cond:
+            missing = self.size - self.total
+            self.total += missing
+        for _ in range(missing):
+            threading.Thread(target=self._spawn_idle, daemon=True).start()
+
+    def _spawn_idle(self) -> None:
+        try:
+            worker = Worker(self.python, self.preload)
+        except (WorkerError, OSError) as e:
+            print(f"worker_pool: {e}", file=sys.stderr)
+            with self.cond:
+                self.total -= 1
+                self.cond.notify()
+            return
+        with self.cond:
+            self.idle.append(worker)
+            self.cond.notify()
+
+    def acquire(self) -> Worker:
+        with self.cond:
+            while not self.idle:
+                if self.total < self.size:
+                    self.total += 1
+                    break
+                self.cond.wait()
+            else:
+                return self.idle.pop()
+        # Nothing warm and room to grow: start one for this request
+        try:
+            return Worker(self.python, self.preload)
+        except BaseException:
+            with self.cond:
+                self.total -= 1
+                self.cond.notify()
+            raise
+
+    def release(self, worker: Worker) -> None:
+        if worker.alive and worker.runs < self.max_runs and not (self.max_rss and worker.rss > self.max_rss):
+            with self.cond:
+                self.idle.append(worker)
+                self.cond.notify()
+            return
+        worker.kill()
+        with self.cond:
+            self.recycled += 1
+            self.total -= 1
+        # Replace it in the background so the next request still finds a warm worker
+        self.prewarm()
+
+    def close(self) -> None:
+        with self.cond:
+            workers, self.idle = self.idle, []
+        for worker in workers:
+            worker.kill()
+
+class Manager:
+    def __init__(self, venvs_dir: Path, preload, size: int, max_runs: int, max_rss: int, timeout: float):
+        self.venvs_dir = venvs_dir
+        self.preload = preload
+        self.size = size
+        self.max_runs = max_runs
+        self.max_rss = max_rss
+        self.timeout = timeout
+        self.pools = {}
+        self.sessions = {}
+        # One single-threaded queue per session keeps its requests in arrival order
+        self.session_queues = {}
+        self.lock = threading.Lock()
+        self.output_lock = threading.Lock()
+
+    def pool(self, venv: str) -> VenvPool:
+        with self.lock:
+            pool = self.pools.get(venv)
+            if pool is None:
+                pool = self.pools[venv] = VenvPool(venv_python(self.venvs_dir, venv), self.preload, self.size,
+                                                   self.max_runs, self.max_rss)
+                pool.prewarm()
+            return pool
+
+    def session(self, venv: str, name: str):
+        key = (venv, name)
+        with self.lock:
+            entry = self.sessions.get(key)
+            if entry is None:
+                entry = self.sessions[key] = [None, threading.Lock()]
+        return key, entry
+
+    def end_session(self, key) -> bool:
+        with self.lock:
+            entry = self.sessions.pop(key, None)
+            requests = self.session_queues.pop(key, None)
+        if requests:
+            requests.shutdown(wait=False)
+        if entry and entry[0]:
+            entry[0].kill()
+        return entry is not None
+
+    def run_session(self, venv: str, name: str, code: str, timeout: float) -> dict:
+        key, entry = self.session(venv, name)
+        with entry[1]:
+            if entry[0] is None or not entry[0].alive:
+                entry[0] = Worker(venv_python(self.venvs_dir, venv), self.preload, session=True)
+            worker = entry[0]
+            response = worker.run(code, timeout)
+            if not worker.alive:
+                self.end_session(key)
+                response['stderr'] += f"\n[session '{name}' ended; its state was lost]"
+            elif self.max_rss and worker.rss > self.max_rss:
+                self.end_session(key)
+                response['stderr'] += (f"\n[session '{name}' ended: {worker.rss // (1024 * 1024)} MB exceeds "
+                                       f"the {self.max_rss // (1024 * 1024)} MB limit]")
+            return response
+
+    def handle(self, request: dict) -> dict:
+        venv = request.get('venv') or 'default'
+        timeout = float(request.get('timeout') or self.timeout)
+        name = request.get('session')
+        try:
+            if name and request.get('end_session'):
+                ended = self.end_session((venv, name))
+                return {'ok': True, 'stdout': f"Session '{name}' {'ended' if ended else 'not found'}\n",
+                        'stderr': ''}
+            if name:
+                return self.run_session(venv, name, request['code'], timeout)
+            pool = self.pool(venv)
+            worker = pool.acquire()
+            try:
+                return worker.run(request['code'], timeout)
+            finally:
+                pool.release(worker)
+        except (WorkerError, OSError) as e:
+            return {'ok': False, 'stdout': '', 'stderr': str(e)}
+
+    def respond(self, request: dict) -> None:
+        response = self.handle(request)
+        response['id'] = request.get('id')
+        with self.output_lock:
+            sys.stdout.write(json.dumps(response) + '\n')
+            sys.stdout.flush()
+
+    def reap_sessions(self) -> None:
+        while True:
+            time.sleep(SESSION_IDLE_SECONDS / 10)
+            now = time.monotonic()
+            with self.lock:
+                stale = [key for key, (worker, _) in self.sessions.items()
+                         if worker and now - worker.last_used > SESSION_IDLE_SECONDS]
+            for key in stale:
+                self.end_session(key)
+
+    def serve(self) -> None:
+        self.pool('default')
+        threading.Thread(target=self.reap_sessions, daemon=True).start()
+        # Requests are read only after this line, so until then the caller may run them elsewhere
+        with self.output_lock:
+            sys.stdout.write(json.dumps({'ready': True}) + '\n')
+            sys.stdout.flush()
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                continue
+            if request.get('session'):
+                key = (request.get('venv') or 'default', request['session'])
+                with self.lock:
+                    if key not in self.session_queues:
+                        self.session_queues[key] = ThreadPoolExecutor(max_workers=1)
+                    self.session_queues[key].submit(self.respond, request)
+            else:
+                threading.Thread(target=self.respond, args=(request,), daemon=True).start()
+        self.close()
+
+    def close(self) -> None:
+        for pool in self.pools.values():
+            pool.close()
+        for key in list(self.sessions):
+            self.end_session(key)
+
+# --- Benchmark -------------------------------------------------------------
+
+def _summary(label: str, seconds) -> str:
+    ms = sorted(value * 1000 for value in seconds)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return f"{label:<6} median {statistics.median(ms):8.1f} ms   p95 {p95:8.1f} ms   min {ms[0]:8.1f} ms"
+
+def benchmark(python: str, preload, runs: int, code: str) -> None:
+    snippet = ''.join(f'import {name}\n' for name in preload) + code
+    cold = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([python, '-c', snippet], capture_output=True, check=False)
+        cold.append(time.perf_counter() - started)
+
+    pool = VenvPool(python, preload, size=1)
+    pool.release(pool.acquire())  # wait until one worker is warm
+    warm = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        worker = pool.acquire()
+        worker.run(snippet, DEFAULT_TIMEOUT)
+        pool.release(worker)
+        warm.append(time.perf_counter() - started)
+    pool.close()
+
+    print(f"{runs} runs of {snippet!r} with {python}")
+    print(_summary('cold', cold))
+    print(_summary('warm', warm))
+    print(f"speedup {statistics.median(cold) / statistics.median(warm):.1f}x (median)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('mode', choices=['serve', 'worker', 'benchmark'])
+    parser.add_argument('--venvs-dir', default=str(Path(__file__).resolve().parent / '.venvs'))
+    parser.add_argument('--preload', default=os.environ.get('PYINTERP_PRELOAD', DEFAULT_PRELOAD),
+                        help='Comma-separated modules each worker imports at start-up')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE, help='Warm workers per venv')
+    parser.add_argument('--max-runs', type=int, default=DEFAULT_MAX_RUNS, help='Recycle a worker after this many runs')
+    parser.add_argument('--max-rss-mb', type=int, default=DEFAULT_MAX_RSS_MB,
+                        help='Recycle a worker whose RSS exceeds this many MB (0: no limit)')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Default per-run timeout in seconds')
+    parser.add_argument('--session', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--venv', default='default', help='benchmark: venv to measure')
+    parser.add_argument('--runs', type=int, default=20, help='benchmark: runs per mode')
+    parser.add_argument('--code', default='print(1)', help='benchmark: code to run after the preload imports')
+    args = parser.parse_args()
+
+    preload = [name.strip() for name in args.preload.split(',') if name.strip()]
+    if args.mode == 'worker':
+        worker_main(preload, args.session)
+    elif args.mode == 'benchmark':
+        benchmark(venv_python(Path(args.venvs_dir), args.venv), preload, args.runs, args.code)
+    else:
+        Manager(Path(args.venvs_dir), preload, args.pool_size, args.max_runs, args.max_rss_mb * 1024 * 1024,
+                args.timeout).serve()
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,87 @@
 import argparse
+import json
+import os
 import sys
+import time
+from pathlib import Path
+
+from github_api import DEFAULT_CACHE_DIR, MAX_CONNECTIONS, GitHubClient, GitHubError
+
+FIELDS = ('name', 'full_name', 'html_url', 'description', 'private', 'fork', 'archived', 'language',
+          'stargazers_count', 'forks_count', 'updated_at')
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--info', action='store_true', help='Show script information')
     parser.add_argument('--username', help='GitHub username to list repositories for')
+    parser.add_argument('--org', help='GitHub organization to list repositories for')
+    parser.add_argument('--type', help='Repository type filter, e.g. all, owner, member, public, private, forks')
+    parser.add_argument('--token', default=os.environ.get('GITHUB_TOKEN'), help='API token (default: $GITHUB_TOKEN)')
+    parser.add_argument('--api-url', default=os.environ.get('GITHUB_API_URL'),
+                        help='API base URL (default: $GITHUB_API_URL or https://api.github.com)')
+    parser.add_argument('--workers', type=int, default=MAX_CONNECTIONS, help='Pages fetched concurrently')
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR), help='ETag cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='Skip the ETag cache')
+    parser.add_argument('--json', action='store_true', help='Print repositories as JSON')
     args = parser.parse_args()
 
     if args.info:
         print("""
 Tool Name: GitHub Repository Lister
-Description: Lists public repositories for a given GitHub username
-Usage: swiss-army-knife github-list-repos --username <github_username>
+Description: Lists repositories for a GitHub user or organization
+Usage: swiss-army-knife github-list-repos --username <github_username> [options]
 Arguments:
   --username: GitHub username to list repositories for
+  --org: GitHub organization to list repositories for
+  --type: Repository type filter (all, owner, member, public, private, forks, sources)
+  --token: API token, raising the rate limit and including private repositories (default: $GITHUB_TOKEN)
+  --api-url: API base URL, e.g. for GitHub Enterprise (default: $GITHUB_API_URL)
+  --workers: Pages fetched concurrently over keep-alive connections (default: 8)
+  --cache-dir: ETag cache directory (default: ~/.cache/sak-github or $SAK_GITHUB_CACHE)
+  --no-cache: Skip the ETag cache
+  --json: Print repositories as JSON
+Notes:
+  Pages are fetched concurrently once the first page reports the last page number.
+  Unchanged pages are revalidated with If-None-Match; GitHub answers 304, which
+  doesn't count against the rate limit. Rate-limit headers and Retry-After are honored.
 Example:
   swiss-army-knife github-list-repos --username octocat
+  swiss-army-knife github-list-repos --org my-org --type sources --json
         """)
         return
 
-    # Implementation here
-    pass
+    if not args.username and not args.org and not args.token:
+        parser.print_help()
+        return
+    if args.org:
+        path, params = f'/orgs/{args.org}/repos', {'type': args.type or 'all'}
+    elif args.username:
+        path, params = f'/users/{args.username}/repos', {'type': args.type or 'owner'}
+    else:
+        # The authenticated user's own repositories, including private ones
+        path, params = '/user/repos', {'type': args.type} if args.type else {}
+
+    started = time.perf_counter()
+    cache_dir = None if args.no_cache else Path(args.cache_dir).expanduser()
+    try:
+        with GitHubClient(args.api_url, args.token, cache_dir, max_connections=args.workers) as client:
+            repos = client.paginate(path, params, args.workers)
+    except GitHubError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps([{field: repo.get(field) for field in FIELDS} for repo in repos], indent=2))
+    else:
+        for repo in repos:
+            description = f" - {repo['description']}" if repo.get('description') else ''
+            print(f"{repo['full_name']}{description}")
+
+    stats = client.stats
+    remaining = client.rate_limit.remaining
+    print(f"{len(repos)} repositories in {time.perf_counter() - started:.2f}s: {stats['requests']} requests, "
+          f"{stats['not_modified']} not modified"
+          + (f", rate limit remaining {remaining}" if remaining is not None else ''), file=sys.stderr)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,9 +1,178 @@
 import argparse
+import base64
+import hashlib
+import json
+import os
+import stat
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import quote
+
+from github_api import MAX_CONNECTIONS, GitHubClient, GitHubError
+
+class LocalFile(NamedTuple):
+    path: str            # path in the repository
+    source: Optional[Path]
+    content: Optional[bytes]
+    mode: str
+    sha: str             # git blob SHA-1
+
+    def read(self) -> bytes:
+        return self.content if self.content is not None else self.source.read_bytes()
+
+def blob_sha(data: bytes) -> str:
+    """The SHA-1 git assigns a blob with this content."""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+def _local_file(path: str, source: Optional[Path] = None, content: Optional[bytes] = None) -> LocalFile:
+    data = content if content is not None else source.read_bytes()
+    # Windows has no execute bit (os.access reports every file executable), so files are 100644 there
+    executable = source is not None and os.name != 'nt' and bool(source.stat().st_mode & stat.S_IXUSR)
+    return LocalFile(path.strip('/'), source, content, '100755' if executable else '100644', blob_sha(data))
+
+def collect_files(directory: Optional[str] = None, manifest: Optional[str] = None, prefix: str = '') -> List[LocalFile]:
+    """Files to commit, from a directory tree or a JSON manifest.
+
+    A manifest is a list of {"path": ..., "source": ...} or {"path": ..., "content": ...}
+    entries; sources are relative to the manifest.
+    """
+    prefix = prefix.strip('/')
+    join = (lambda path: f'{prefix}/{path}') if prefix else (lambda path: path)
+    files = []
+    if directory:
+        root = Path(directory)
+        for source in sorted(root.rglob('*')):
+            if source.is_file() and '.git' not in source.relative_to(root).parts:
+                files.append(_local_file(join(source.relative_to(root).as_posix()), source))
+    if manifest:
+        base = Path(manifest).parent
+        with open(manifest, encoding='utf-8') as f:
+            entries = json.load(f)
+        for entry in entries:
+            if 'content' in entry:
+                files.append(_local_file(join(entry['path']), content=entry['content'].encode('utf-8')))
+            else:
+                files.append(_local_file(join(entry['path']), base / entry['source']))
+    return files
+
+def batch_commit(client: GitHubClient, owner: str, repo: str, files: List[LocalFile], message: str,
+                 branch: Optional[str] = None, workers: int = MAX_CONNECTIONS) -> Optional[Dict]:
+    """Commit files to a branch as one commit, using the Git Data API.
+
+    Blobs the remote tree already contains (same SHA anywhere in the tree) are
+    not uploaded, and paths whose content and mode are unchanged are left out
+    of the new tree. Missing blobs are uploaded concurrently; one tree (on top of the
+    current one), one commit and one ref update follow. Returns the new commit,
+    or None when nothing changed.
+    """
+    base = f'/repos/{owner}/{repo}'
+    if not branch:
+        branch = client.get(base)['default_branch']
+    head = client.get(f'{base}/git/ref/heads/{quote(branch)}')['object']['sha']
+    base_tree = client.get(f'{base}/git/commits/{head}')['tree']['sha']
+    remote = client.get(f'{base}/git/trees/{base_tree}', {'recursive': 1})
+    remote_paths = {entry['path']: (entry['sha'], entry['mode']) for entry in remote['tree'] if entry['type'] == 'blob'}
+    remote_blobs = {sha for sha, _ in remote_paths.values()}
+
+    # A mode change alone (chmod +x) is a change too
+    changed = [file for file in files if remote_paths.get(file.path) != (file.sha, file.mode)]
+    if not changed:
+        return None
+    # Several paths may share one blob; upload it once
+    missing = {file.sha: file for file in changed if file.sha not in remote_blobs}
+
+    def upload(file: LocalFile) -> None:
+        # Blobs and trees are content-addressed, so a retried POST can't create a duplicate
+        created = client.post(f'{base}/git/blobs', {'content': base64.b64encode(file.read()).decode('ascii'),
+                                                    'encoding': 'base64'}, idempotent=True)
+        if created['sha'] != file.sha:
+            raise GitHubError(0, f"Blob for {file.path} was stored as {created['sha']}, expected {file.sha}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list() re-raises the first upload failure
+        list(executor.map(upload, missing.values()))
+
+    tree = client.post(f'{base}/git/trees', {
+        'base_tree': base_tree,
+        'tree': [{'path': file.path, 'mode': file.mode, 'type': 'blob', 'sha': file.sha} for file in changed],
+    }, idempotent=True)
+    commit = client.post(f'{base}/git/commits', {'message': message, 'tree': tree['sha'], 'parents': [head]})
+    client.patch(f'{base}/git/refs/heads/{quote(branch)}', {'sha': commit['sha']})
+    commit['stats'] = {'files': len(files), 'changed': len(changed), 'uploaded': len(missing),
+                       'reused': sum(1 for file in changed if file.sha in remote_blobs)}
+    return commit
+
+def create_file(client: GitHubClient, owner: str, repo: str, path: str, content: bytes, message: str,
+                branch: Optional[str] = None) -> Dict:
+    """Create or update a single file through the contents API (one request, one commit)."""
+    url = f'/repos/{owner}/{repo}/contents/{quote(path.strip("/"))}'
+    data = {'message': message, 'content': base64.b64encode(content).decode('ascii')}
+    if branch:
+        data['branch'] = branch
+    try:
+        existing = client.get(url, {'ref': branch} if branch else None)
+    except GitHubError as e:
+        if e.status != 404:
+            raise
+    else:
+        if existing.get('sha') == blob_sha(content):
+            return {'commit': None, 'content': existing}
+        data['sha'] = existing['sha']
+    return client.put(url, data)
+
+def require(args, *names) -> None:
+    missing = [f"--{name.replace('_', '-')}" for name in names if not getattr(args, name)]
+    if missing:
+        raise ValueError(f"Action {args.action} requires {', '.join(missing)}")
+
+def run_action(client: GitHubClient, args) -> str:
+    if args.action == 'create-file':
+        require(args, 'owner', 'repo', 'path', 'message')
+        if args.content is None and not args.file:
+            raise ValueError("Action create-file requires --content or --file")
+        content = Path(args.file).read_bytes() if args.file else args.content.encode('utf-8')
+        result = create_file(client, args.owner, args.repo, args.path, content, args.message, args.branch)
+        if not result['commit']:
+            return f"{args.path} is unchanged"
+        return f"Committed {args.path} as {result['commit']['sha'][:7]}"
+
+    if args.action == 'commit-batch':
+        require(args, 'owner', 'repo', 'message')
+        if not args.dir and not args.manifest:
+            raise ValueError("Action commit-batch requires --dir or --manifest")
+        started = time.perf_counter()
+        files = collect_files(args.dir, args.manifest, args.path or '')
+        commit = batch_commit(client, args.owner, args.repo, files, args.message, args.branch, args.workers)
+        if commit is None:
+            return f"Nothing to commit: all {len(files)} files are unchanged"
+        stats = commit['stats']
+        return (f"Committed {stats['changed']} of {stats['files']} files as {commit['sha'][:7]} "
+                f"({stats['uploaded']} blobs uploaded, {stats['reused']} reused) "
+                f"in {time.perf_counter() - started:.2f}s")
+
+    raise ValueError(f"Action {args.action} is not implemented yet")
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--info', action='store_true', help='Show script information')
+    parser.add_argument('--token', default=os.environ.get('GITHUB_TOKEN'), help='API token (default: $GITHUB_TOKEN)')
+    parser.add_argument('--api-url', default=os.environ.get('GITHUB_API_URL'),
+                        help='API base URL (default: $GITHUB_API_URL or https://api.github.com)')
+    parser.add_argument('--action', choices=['create-repo', 'create-file', 'commit-batch', 'create-issue',
+                                             'create-pr', 'fork'])
+    parser.add_argument('--owner')
+    parser.add_argument('--repo')
+    parser.add_argument('--path', help='File path in the repository (commit-batch: destination directory)')
+    parser.add_argument('--content')
+    parser.add_argument('--file', help='create-file: read content from this local file')
+    parser.add_argument('--message', help='Commit message')
+    parser.add_argument('--branch', help='Branch to commit to (default: the repository default branch)')
+    parser.add_argument('--dir', help='commit-batch: directory to commit')
+    parser.add_argument('--manifest', help='commit-batch: JSON list of {"path", "source" or "content"}')
+    parser.add_argument('--workers', type=int, default=MAX_CONNECTIONS, help='commit-batch: concurrent blob uploads')
     args = parser.parse_args()
 
     if args.info:
@@ -16,29 +185,50 @@ Actions:
   create-repo: Create a new repository
     Required: --repo
     Optional: --description --private
-  
+
   create-file: Create/update a file in a repository
-    Required: --owner --repo --path --content --message
-  
+    Required: --owner --repo --path --message, and --content or --file
+    Optional: --branch
+
+  commit-batch: Commit a directory or manifest of files as a single commit
+    Required: --owner --repo --message, and --dir or --manifest
+    Optional: --branch --path (destination directory) --workers (default: 8)
+    Blobs already in the branch's tree are not uploaded; the rest are uploaded
+    concurrently, then one tree, one commit and one ref update are created.
+    Transient failures and rate limits are retried with backoff.
+
   create-issue: Create a new issue
     Required: --owner --repo --title
     Optional: --body --labels
-  
+
   create-pr: Create a pull request
     Required: --owner --repo --title --head
     Optional: --base --body
-  
+
   fork: Fork a repository
     Required: --owner --repo
     Optional: --organization
 
+Options:
+  --token: API token (default: $GITHUB_TOKEN)
+  --api-url: API base URL, e.g. for GitHub Enterprise (default: $GITHUB_API_URL)
+
 Example:
   swiss-army-knife github --token <token> --action create-repo --repo test-repo --description "Test repo" --private
+  swiss-army-knife github --action commit-batch --owner me --repo site --dir build/ --path docs --message "Regenerate docs"
         """)
         return
 
-    # Implementation here
-    pass
+    if not args.action:
+        parser.print_help()
+        return
+
+    try:
+        with GitHubClient(args.api_url, args.token, max_connections=args.workers) as client:
+            print(run_action(client, args))
+    except (GitHubError, ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
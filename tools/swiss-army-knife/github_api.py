@@ -0,0 +1,320 @@
+import hashlib
+import http.client
+import json
+import os
+import queue
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+DEFAULT_API_URL = 'https://api.github.com'
+DEFAULT_CACHE_DIR = Path(os.environ.get('SAK_GITHUB_CACHE', Path.home() / '.cache' / 'sak-github'))
+PER_PAGE = 100
+MAX_CONNECTIONS = 8
+RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+# Longest we will sleep for a rate-limit reset before giving up
+MAX_RATE_LIMIT_WAIT = 15 * 60
+
+_LINK_RE = re.compile(r'<([^>]+)>;\s*rel="([^"]+)"')
+
+class GitHubError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"GitHub API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+class Response:
+    def __init__(self, status: int, headers: Dict[str, str], data, cached: bool = False):
+        self.status = status
+        self.headers = headers
+        self.data = data
+        self.cached = cached
+
+    @property
+    def links(self) -> Dict[str, str]:
+        return {rel: url for url, rel in _LINK_RE.findall(self.headers.get('link', ''))}
+
+class ConnectionPool:
+    """Keep-alive connections to one host, shared between threads."""
+
+    def __init__(self, scheme: str, host: str, size: int = MAX_CONNECTIONS, timeout: float = 30):
+        self.factory = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        self.host = host
+        self.timeout = timeout
+        self.idle = queue.LifoQueue(maxsize=size)
+
+    def get(self) -> http.client.HTTPConnection:
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return self.new()
+
+    def new(self) -> http.client.HTTPConnection:
+        return self.factory(self.host, timeout=self.timeout)
+
+    def put(self, connection: http.client.HTTPConnection) -> None:
+        try:
+            self.idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+class ResponseCache:
+    """ETag cache on disk: a 304 for an unchanged resource doesn't count against the rate limit."""
+
+    def __init__(self, directory: Path, identity: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Responses differ per token, so the token's hash is part of every key
+        self.identity = hashlib.sha256(identity.encode()).hexdigest()
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(f'{self.identity}:{url}'.encode()).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[Dict]:
+        try:
+            with open(self._path(url), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, etag: str, link: str, data) -> None:
+        path = self._path(url)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'etag': etag, 'link': link, 'data': data}, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+class RateLimit:
+    """Tracks X-RateLimit-* headers and makes every thread wait out an exhausted quota."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+
+    def update(self, headers: Dict[str, str]) -> None:
+        if 'x-ratelimit-remaining' not in headers:
+            return
+        with self.lock:
+            self.limit = int(headers.get('x-ratelimit-limit', 0)) or self.limit
+            self.remaining = int(headers['x-ratelimit-remaining'])
+            self.reset = float(headers.get('x-ratelimit-reset', 0)) or self.reset
+
+    def wait(self) -> None:
+        with self.lock:
+            if self.remaining is None or self.remaining > 0 or not self.reset:
+                return
+            delay = self.reset - time.time() + 1
+        if delay > 0:
+            _sleep(delay, 'rate limit exhausted')
+
+    def retry_after(self, response: Response) -> Optional[float]:
+        """Seconds to wait before retrying a 403/429, or None if it isn't a rate-limit response."""
+        if 'retry-after' in response.headers:
+            return float(response.headers['retry-after'])
+        if response.headers.get('x-ratelimit-remaining') == '0':
+            return max(0.0, float(response.headers.get('x-ratelimit-reset', 0)) - time.time() + 1)
+        message = response.data.get('message', '') if isinstance(response.data, dict) else ''
+        if 'rate limit' in message.lower():
+            # Secondary limits without Retry-After: GitHub asks for at least a minute
+            return 60.0
+        return None
+
+def _sleep(delay: float, reason: str) -> None:
+    if delay > MAX_RATE_LIMIT_WAIT:
+        raise GitHubError(429, f"{reason}; retry in {delay:.0f}s")
+    print(f"Waiting {delay:.0f}s: {reason}", file=sys.stderr)
+    time.sleep(delay)
+
+def _backoff(attempt: int) -> float:
+    return min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+class GitHubClient:
+    """Minimal REST client: pooled keep-alive connections, ETag caching, rate-limit aware retries.
+
+    Thread-safe; paginate() fetches pages concurrently once the last page is
+    known from the first page's Link header.
+    """
+
+    def __init__(self, api_url: Optional[str] = None, token: Optional[str] = None,
+                 cache_dir: Optional[Path] = DEFAULT_CACHE_DIR, max_connections: int = MAX_CONNECTIONS,
+                 timeout: float = 30):
+        api_url = (api_url or os.environ.get('GITHUB_API_URL') or DEFAULT_API_URL).rstrip('/')
+        parts = urlsplit(api_url)
+        self.prefix = parts.path
+        self.pool = ConnectionPool(parts.scheme, parts.netloc, max_connections, timeout)
+        self.token = token
+        self.cache = ResponseCache(cache_dir, token or '') if cache_dir else None
+        self.rate_limit = RateLimit()
+        self.max_connections = max_connections
+        self.stats = {'requests': 0, 'not_modified': 0, 'retries': 0}
+        self._stats_lock = threading.Lock()
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _target(self, path: str, params: Optional[Dict] = None) -> str:
+        if path.startswith(('http://', 'https://')):
+            parts = urlsplit(path)
+            path = parts.path + (f'?{parts.query}' if parts.query else '')
+        elif not path.startswith(self.prefix + '/'):
+            path = self.prefix + '/' + path.lstrip('/')
+        if params:
+            path += ('&' if '?' in path else '?') + urlencode(params)
+        return path
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _send(self, method: str, target: str, body: Optional[bytes], headers: Dict[str, str],
+              fresh: bool = False) -> Response:
+        connection = self.pool.new() if fresh else self.pool.get()
+        try:
+            connection.request(method, target, body=body, headers=headers)
+            raw = connection.getresponse()
+            payload = raw.read()
+        except BaseException:
+            connection.close()
+            raise
+        response_headers = {key.lower(): value for key, value in raw.getheaders()}
+        if raw.will_close:
+            connection.close()
+        else:
+            self.pool.put(connection)
+        data = None
+        if payload:
+            try:
+                data = json.loads(payload)
+            except ValueError:
+                data = payload.decode('utf-8', 'replace')
+        return Response(raw.status, response_headers, data)
+
+    def request(self, method: str, path: str, params: Optional[Dict] = None, data=None,
+                use_cache: bool = True, idempotent: Optional[bool] = None) -> Response:
+        """Send a request, retrying connection errors, 5xx and rate-limit responses with backoff.
+
+        Only rate-limit responses, which the server rejected without acting, are
+        retried for non-idempotent requests (POST unless idempotent=True): after
+        a dropped connection or a 5xx it may already have created the resource.
+        Those requests go out on a new connection, so an idle keep-alive
+        connection the server has closed can't fail them.
+        """
+        if idempotent is None:
+            idempotent = method != 'POST'
+        target = self._target(path, params)
+        headers = {'Accept': 'application/vnd.github+json', 'User-Agent': 'swiss-army-knife',
+                   'X-GitHub-Api-Version': '2022-11-28'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        cached = self.cache.get(target) if self.cache and use_cache and method == 'GET' else None
+        if cached:
+            headers['If-None-Match'] = cached['etag']
+
+        for attempt in range(RETRIES + 1):
+            self.rate_limit.wait()
+            try:
+                response = self._send(method, target, body, headers, fresh=not idempotent)
+            except (http.client.HTTPException, OSError) as e:
+                # Includes stale keep-alive connections the server already closed
+                if not idempotent:
+                    raise GitHubError(0, f"{method} {target}: {e} (not retried; it may have been applied)") from e
+                if attempt == RETRIES:
+                    raise GitHubError(0, f"{method} {target}: {e}") from e
+                self._count('retries')
+                time.sleep(_backoff(attempt))
+                continue
+            self._count('requests')
+            self.rate_limit.update(response.headers)
+
+            if response.status == 304 and cached:
+                self._count('not_modified')
+                headers_with_link = dict(response.headers, link=cached.get('link') or '')
+                return Response(200, headers_with_link, cached['data'], cached=True)
+            if response.status in (403, 429) and attempt < RETRIES:
+                delay = self.rate_limit.retry_after(response)
+                if delay is not None:
+                    self._count('retries')
+                    _sleep(delay, f"rate limited on {target}")
+                    continue
+            if response.status >= 500 and idempotent and attempt < RETRIES:
+                self._count('retries')
+                time.sleep(_backoff(attempt))
+                continue
+            break
+
+        if response.status >= 400:
+            message = response.data.get('message') if isinstance(response.data, dict) else response.data
+            raise GitHubError(response.status, f"{method} {target}: {message}")
+        if self.cache and method == 'GET' and 'etag' in response.headers:
+            self.cache.put(target, response.headers['etag'], response.headers.get('link', ''), response.data)
+        return response
+
+    def get(self, path: str, params: Optional[Dict] = None):
+        return self.request('GET', path, params).data
+
+    def post(self, path: str, data, idempotent: bool = False):
+        return self.request('POST', path, data=data, idempotent=idempotent).data
+
+    def patch(self, path: str, data):
+        return self.request('PATCH', path, data=data).data
+
+    def put(self, path: str, data):
+        return self.request('PUT', path, data=data).data
+
+    def paginate(self, path: str, params: Optional[Dict] = None, workers: Optional[int] = None) -> List:
+        """Fetch every page of a list endpoint, in order.
+
+        Page 1's Link rel="last" gives the page count; the remaining pages are
+        then fetched concurrently. Without it, falls back to following rel="next".
+        """
+        params = dict(params or {}, per_page=PER_PAGE)
+        first = self.request('GET', path, params)
+        items = list(first.data or [])
+        last = first.links.get('last')
+        if last:
+            last_query = dict(parse_qsl(urlsplit(last).query))
+            pages = int(last_query.get('page', 1))
+            page_params = [dict(last_query, page=page) for page in range(2, pages + 1)]
+            with ThreadPoolExecutor(max_workers=workers or self.max_connections) as executor:
+                for data in executor.map(lambda query: self.get(urlsplit(last).path, query), page_params):
+                    items.extend(data or [])
+            return items
+
+        url = first.links.get('next')
+        while url:
+            response = self.request('GET', url)
+            items.extend(response.data or [])
+            url = response.links.get('next')
+        return items
@@ -3,6 +3,9 @@ import sys
 import json
 from pathlib import Path
 
+import sak_instrument
+from sak_instrument import span
+
 class KeyValueStore:
     def __init__(self, filename="kvstore.json"):
         self.filename = Path(filename)
@@ -14,31 +17,35 @@ class KeyValueStore:
                 json.dump({}, f)
 
     def get(self, key):
-        with open(self.filename, 'r') as f:
+        with open(self.filename, 'r') as f, span('load'):
             data = json.load(f)
             return data.get(key)
 
     def set(self, key, value):
         with open(self.filename, 'r+') as f:
-            data = json.load(f)
+            with span('load'):
+                data = json.load(f)
             data[key] = value
-            f.seek(0)
-            json.dump(data, f, indent=2)
-            f.truncate()
+            with span('save'):
+                f.seek(0)
+                json.dump(data, f, indent=2)
+                f.truncate()
 
     def delete(self, key):
         with open(self.filename, 'r+') as f:
-            data = json.load(f)
+            with span('load'):
+                data = json.load(f)
             if key in data:
                 del data[key]
-                f.seek(0)
-                json.dump(data, f, indent=2)
-                f.truncate()
+                with span('save'):
+                    f.seek(0)
+                    json.dump(data, f, indent=2)
+                    f.truncate()
                 return True
             return False
 
     def list_all(self):
-        with open(self.filename, 'r') as f:
+        with open(self.filename, 'r') as f, span('load'):
             return json.load(f)
 
 def main():
@@ -48,6 +55,7 @@ def main():
                         help='Action to perform')
     parser.add_argument('key', nargs='?', help='Key to operate on')
     parser.add_argument('value', nargs='?', help='Value to set (for set action)')
+    sak_instrument.add_arguments(parser)
     args = parser.parse_args()
 
     if args.info:
@@ -60,12 +68,19 @@ Actions:
   set <key> <value>: Set key to value
   delete <key>: Delete key
   list: Show all keys and values
+Options:
+  --profile FILE: Write a cProfile dump (- prints the top functions)
+  --timings: Print time spent loading and saving the store
 Example:
   swiss-army-knife kvstore set mykey myvalue
   swiss-army-knife kvstore get mykey
         """)
         return
 
+    with sak_instrument.instrument(args):
+        run(args)
+
+def run(args):
     store = KeyValueStore()
 
     if args.action == 'get':
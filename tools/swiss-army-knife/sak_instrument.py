@@ -0,0 +1,185 @@
+"""Shared profiling and timing for .sak.py scripts.
+
+A script opts in with two calls:
+
+    sak_instrument.add_arguments(parser)     # --profile FILE, --timings
+    with sak_instrument.instrument(args):
+        ...
+
+and marks phases anywhere below main() with `with sak_instrument.span('load'):`.
+Spans cost almost nothing unless --timings is given. Setting SAK_SAMPLE_PROFILE
+to a file path turns on a low-overhead sampling profiler that writes collapsed
+stacks (flamegraph.pl / speedscope format) when the script exits, without any
+command-line change.
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SAMPLE_ENV = 'SAK_SAMPLE_PROFILE'
+SAMPLE_INTERVAL_ENV = 'SAK_SAMPLE_INTERVAL_MS'
+DEFAULT_SAMPLE_INTERVAL_MS = 5
+# Rows printed by --profile - (to stderr)
+PROFILE_ROWS = 30
+
+def peak_rss() -> Optional[int]:
+    """High-water mark of this process's resident memory in bytes, where the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class Span:
+    def __init__(self, name: str):
+        self.name = name
+        self.elapsed = 0.0
+        self.count = 0
+        self.peak_rss = None
+        self.children: Dict[str, 'Span'] = {}
+
+    def child(self, name: str) -> 'Span':
+        span = self.children.get(name)
+        if span is None:
+            span = self.children[name] = Span(name)
+        return span
+
+class _Recorder:
+    """The span tree. Repeated spans with the same name and parent are merged and counted."""
+
+    def __init__(self):
+        self.root = Span('total')
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = time.perf_counter()
+
+    def stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            # Spans opened on other threads hang off the root
+            stack = self.local.stack = [self.root]
+        return stack
+
+    def finish(self) -> None:
+        self.root.elapsed = time.perf_counter() - self.started
+        self.root.count = 1
+        self.root.peak_rss = peak_rss()
+
+    def report(self, out=sys.stderr) -> None:
+        print('Timings (wall clock, peak RSS so far):', file=out)
+        self._print(self.root, 0, out)
+
+    def _print(self, span: Span, depth: int, out) -> None:
+        label = f"{'  ' * depth}{span.name}" + (f" x{span.count}" if span.count > 1 else '')
+        memory = f"{span.peak_rss / (1024 * 1024):9.1f} MB" if span.peak_rss is not None else ''
+        print(f"  {label:<40} {span.elapsed:9.3f}s {memory}", file=out)
+        for child in span.children.values():
+            self._print(child, depth + 1, out)
+
+_recorder: Optional[_Recorder] = None
+
+@contextmanager
+def span(name: str):
+    """Time a named phase; nested spans form a tree. A no-op unless --timings is on."""
+    recorder = _recorder
+    if recorder is None:
+        yield
+        return
+    stack = recorder.stack()
+    with recorder.lock:
+        node = stack[-1].child(name)
+    stack.append(node)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stack.pop()
+        with recorder.lock:
+            node.elapsed += elapsed
+            node.count += 1
+            node.peak_rss = peak_rss()
+
+class Sampler(threading.Thread):
+    """Samples every other thread's stack at a fixed interval and counts identical stacks."""
+
+    def __init__(self, path: str, interval: float):
+        super().__init__(name='sak-sampler', daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stacks = Counter()
+        self.halt = threading.Event()
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while not self.halt.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def stop(self) -> None:
+        self.halt.set()
+        self.join()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def add_arguments(parser) -> None:
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--profile', metavar='FILE',
+                       help='Write a cProfile (pstats) dump to FILE, or print the top functions with "-"')
+    group.add_argument('--timings', action='store_true', help='Print a tree of timed phases to stderr')
+
+@contextmanager
+def instrument(args=None):
+    """Apply --profile / --timings from args and SAK_SAMPLE_PROFILE for the duration of the block."""
+    global _recorder
+    profile_path = getattr(args, 'profile', None)
+    timings = getattr(args, 'timings', False)
+    sample_path = os.environ.get(SAMPLE_ENV)
+
+    sampler = None
+    if sample_path:
+        interval = float(os.environ.get(SAMPLE_INTERVAL_ENV, DEFAULT_SAMPLE_INTERVAL_MS)) / 1000
+        sampler = Sampler(sample_path, interval)
+        sampler.start()
+    if timings:
+        _recorder = _Recorder()
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            if profile_path == '-':
+                pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(PROFILE_ROWS)
+            else:
+                profiler.dump_stats(profile_path)
+                print(f"Wrote profile to {profile_path} (view with: python -m pstats {profile_path})",
+                      file=sys.stderr)
+        if _recorder is not None:
+            _recorder.finish()
+            _recorder.report()
+            _recorder = None
+        if sampler:
+            sampler.stop()
+            print(f"Wrote {sum(sampler.stacks.values())} stack samples to {sample_path}", file=sys.stderr)
@@ -1,11 +1,64 @@
 import argparse
 import sys
 import json
+import os
 import time
+import importlib
+import socket
+import tempfile
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-import threading
-import queue
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+import sak_instrument
+from sak_instrument import span
+
+DEFAULT_RUNNER = "functions:gpt4"
+DEFAULT_LEASE = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+def write_atomic(path, text):
+    """Write text to path via a temporary file and rename, so readers never see a partial file."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def acquire_lock(fd):
+    """Block until this process holds an exclusive OS lock on fd; the OS drops it if the process dies."""
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            time.sleep(0.005)
+
+def release_lock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
 
 class SwarmAgent:
     def __init__(self, agent_id, task, status="pending"):
@@ -15,7 +68,12 @@ class SwarmAgent:
         self.start_time = datetime.now()
         self.completion_time = None
         self.output_file = f"agent_{agent_id}_output.txt"
-        
+        # Claim token while a worker holds the agent; the lease expires unless renewed by heartbeats
+        self.worker = None
+        self.lease_expires = None
+        self.attempts = 0
+        self.error = None
+
     def to_dict(self):
         return {
             "agent_id": self.agent_id,
@@ -23,27 +81,42 @@ class SwarmAgent:
             "status": self.status,
             "start_time": str(self.start_time),
             "completion_time": str(self.completion_time) if self.completion_time else None,
-            "output_file": self.output_file
+            "output_file": self.output_file,
+            "worker": self.worker,
+            "lease_expires": self.lease_expires,
+            "attempts": self.attempts,
+            "error": self.error
         }
 
+    @classmethod
+    def from_dict(cls, data):
+        agent = cls(data["agent_id"], data["task"], data["status"])
+        if data.get("start_time"):
+            agent.start_time = datetime.fromisoformat(data["start_time"])
+        if data.get("completion_time"):
+            agent.completion_time = datetime.fromisoformat(data["completion_time"])
+        agent.worker = data.get("worker")
+        agent.lease_expires = data.get("lease_expires")
+        agent.attempts = data.get("attempts", 0)
+        agent.error = data.get("error")
+        return agent
+
 class SwarmManager:
-    def __init__(self):
+    def __init__(self, state_file="swarm_state.json"):
         self.agents = {}
         self.next_id = 1
-        self.state_file = Path("swarm_state.json")
+        self.state_file = Path(state_file)
+        self.lock_file = self.state_file.with_name(self.state_file.name + ".lock")
         self.load_state()
-        
+
     def load_state(self):
+        self.agents = {}
         if self.state_file.exists():
-            with open(self.state_file) as f:
+            with span('load_state'), open(self.state_file) as f:
                 state = json.load(f)
                 self.next_id = state.get("next_id", 1)
                 for agent_data in state.get("agents", []):
-                    agent = SwarmAgent(
-                        agent_data["agent_id"],
-                        agent_data["task"],
-                        agent_data["status"]
-                    )
+                    agent = SwarmAgent.from_dict(agent_data)
                     self.agents[agent.agent_id] = agent
 
     def save_state(self):
@@ -51,30 +124,115 @@ class SwarmManager:
             "next_id": self.next_id,
             "agents": [agent.to_dict() for agent in self.agents.values()]
         }
-        with open(self.state_file, 'w') as f:
-            json.dump(state, f, indent=2)
+        with span('save_state'):
+            write_atomic(self.state_file, json.dumps(state, indent=2))
+
+    @contextmanager
+    def transaction(self):
+        """Hold the state lock, reload the state, and save it when the block succeeds.
+
+        The lock is flock (msvcrt.locking on Windows) on the lock file, so separate
+        processes and threads never interleave updates, and a worker killed while
+        holding it can't block the others.
+        """
+        fd = os.open(self.lock_file, os.O_CREAT | os.O_RDWR)
+        try:
+            acquire_lock(fd)
+            try:
+                self.load_state()
+                yield
+                self.save_state()
+            finally:
+                release_lock(fd)
+        finally:
+            os.close(fd)
 
     def create_agent(self, task):
-        agent = SwarmAgent(self.next_id, task)
-        self.agents[agent.agent_id] = agent
-        self.next_id += 1
-        self.save_state()
+        with self.transaction():
+            agent = SwarmAgent(self.next_id, task)
+            self.agents[agent.agent_id] = agent
+            self.next_id += 1
         return agent
 
     def update_agent_status(self, agent_id, status):
-        if agent_id in self.agents:
-            self.agents[agent_id].status = status
-            if status == "completed":
-                self.agents[agent_id].completion_time = datetime.now()
-            self.save_state()
+        with self.transaction():
+            if agent_id in self.agents:
+                self.agents[agent_id].status = status
+                if status == "completed":
+                    self.agents[agent_id].completion_time = datetime.now()
 
     def list_agents(self):
         return [agent.to_dict() for agent in self.agents.values()]
 
+    def claim(self, worker, lease=DEFAULT_LEASE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """Atomically take the oldest pending agent for worker, first requeueing expired leases.
+
+        agent.worker on the returned agent is a token unique to this claim; heartbeat,
+        finish and release only act for it, so a runner whose lease expired can't touch
+        the agent once it is claimed again, even by the same worker.
+        """
+        now = time.time()
+        with self.transaction():
+            for agent in self.agents.values():
+                if agent.status == "running" and agent.lease_expires and agent.lease_expires < now:
+                    self._requeue(agent, "lease expired", max_attempts)
+            pending = [agent for agent in self.agents.values() if agent.status == "pending"]
+            if not pending:
+                return None
+            agent = min(pending, key=lambda agent: agent.agent_id)
+            agent.status = "running"
+            agent.attempts += 1
+            agent.worker = f"{worker}/{agent.attempts}-{uuid.uuid4().hex[:8]}"
+            agent.lease_expires = now + lease
+            return agent
+
+    def _requeue(self, agent, reason, max_attempts):
+        agent.error = reason
+        agent.worker = None
+        agent.lease_expires = None
+        agent.status = "failed" if agent.attempts >= max_attempts else "pending"
+
+    def heartbeat(self, agent_id, token, lease=DEFAULT_LEASE):
+        """Extend a claim's lease; False if the lease was lost to expiry."""
+        with self.transaction():
+            agent = self.agents.get(agent_id)
+            if not agent or agent.worker != token or agent.status != "running":
+                return False
+            agent.lease_expires = time.time() + lease
+            return True
+
+    def finish(self, agent_id, token, status, error=None, output=None):
+        """Record a claim's result, writing output text to the agent's output file; False if the claim was lost."""
+        with self.transaction():
+            agent = self.agents.get(agent_id)
+            if not agent or agent.worker != token:
+                return False
+            if output is not None:
+                # Under the lock, so a superseded runner can't overwrite the current one's output
+                write_atomic(self.state_file.parent / agent.output_file, output)
+            agent.status = status
+            agent.error = error
+            agent.worker = None
+            agent.lease_expires = None
+            agent.completion_time = datetime.now()
+            return True
+
+    def release(self, agent_id, token, reason, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """Give an agent back to the queue after its worker crashed.
+
+        Returns its new status, "pending" or "failed" once out of attempts; None if the claim was lost.
+        """
+        with self.transaction():
+            agent = self.agents.get(agent_id)
+            if not agent or agent.worker != token or agent.status != "running":
+                return None
+            self._requeue(agent, reason, max_attempts)
+            return agent.status
+
     def combine_outputs(self, output_file="combined_output.txt"):
-        completed_agents = [agent for agent in self.agents.values() 
+        completed_agents = [agent for agent in self.agents.values()
                           if agent.status == "completed"]
-        
+
         with open(output_file, 'w') as outfile:
             for agent in completed_agents:
                 try:
@@ -84,6 +242,97 @@ class SwarmManager:
                 except FileNotFoundError:
                     continue
 
+def load_runner(spec):
+    """Resolve 'module:function'; the function takes a task string and returns text or {"response", "status"}."""
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name or "run")
+
+def execute_agent(state_file, agent_id, task, token, runner_spec, lease, heartbeat):
+    """Run one claimed agent. Module-level so process pools can pickle it."""
+    manager = SwarmManager(state_file)
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(heartbeat):
+            if not manager.heartbeat(agent_id, token, lease):
+                return
+
+    threading.Thread(target=beat, daemon=True).start()
+    try:
+        result = load_runner(runner_spec)(task)
+    except Exception as e:
+        result = {"response": f"Error: {e}", "status": "error"}
+    finally:
+        stop.set()
+
+    if isinstance(result, dict):
+        text, ok = str(result.get("response", "")), result.get("status", "success") == "success"
+    else:
+        text, ok = str(result), True
+    status = "completed" if ok else "failed"
+    # Another worker may have taken over after our lease expired; its result wins
+    return status if manager.finish(agent_id, token, status, None if ok else text[:500], text) else "lost"
+
+def run_workers(manager, workers, pool="thread", runner=DEFAULT_RUNNER, lease=DEFAULT_LEASE,
+                max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Drain pending agents with a pool of workers; returns counts per outcome."""
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    executor_class = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+    counts = {"completed": 0, "failed": 0, "lost": 0, "requeued": 0}
+    executor = executor_class(max_workers=workers)
+    running = {}
+
+    def requeue(agent_id, token, attempt, reason):
+        status = manager.release(agent_id, token, reason, max_attempts)
+        if status is None:
+            # The run finished before its pool broke, or the agent was claimed again after its lease expired
+            manager.load_state()
+            agent = manager.agents.get(agent_id)
+            finished = agent and agent.attempts == attempt and agent.status in ("completed", "failed")
+            counts[agent.status if finished else "lost"] += 1
+        else:
+            counts["requeued" if status == "pending" else "failed"] += 1
+
+    def collect(future):
+        """Count a finished run; True if its process pool had crashed."""
+        agent_id, token, attempt = running.pop(future)
+        try:
+            counts[future.result()] += 1
+            return False
+        except BrokenProcessPool as e:
+            requeue(agent_id, token, attempt, f"worker crashed: {e}")
+            return True
+
+    try:
+        while True:
+            broken = False
+            while len(running) < workers:
+                agent = manager.claim(owner, lease, max_attempts)
+                if agent is None:
+                    break
+                try:
+                    future = executor.submit(execute_agent, str(manager.state_file), agent.agent_id, agent.task,
+                                             agent.worker, runner, lease, lease / 3)
+                except BrokenProcessPool as e:
+                    # A child died since the last wait(), and a broken pool takes no new work
+                    requeue(agent.agent_id, agent.worker, agent.attempts, f"worker crashed: {e}")
+                    broken = True
+                    break
+                running[future] = (agent.agent_id, agent.worker, agent.attempts)
+            if not broken:
+                if not running:
+                    return counts
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                broken = any([collect(future) for future in done])
+            if broken:
+                # The broken pool fails every task it still holds: requeue them and start a new pool
+                for future in wait(running)[0]:
+                    collect(future)
+                executor.shutdown(wait=False)
+                executor = executor_class(max_workers=workers)
+    finally:
+        executor.shutdown(wait=True)
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--info', action='store_true', help='Show script information')
@@ -92,6 +341,15 @@ def main():
     parser.add_argument('--update', type=int, help='Update agent status (requires --status)')
     parser.add_argument('--status', choices=['pending', 'running', 'completed', 'failed'])
     parser.add_argument('--combine', action='store_true', help='Combine all completed outputs')
+    parser.add_argument('--run-workers', type=int, metavar='N', help='Run pending agents with N workers')
+    parser.add_argument('--pool', choices=['thread', 'process'], default='thread', help='Worker pool type')
+    parser.add_argument('--runner', default=DEFAULT_RUNNER,
+                        help='module:function that runs a task (default: functions:gpt4)')
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                        help='Seconds a claimed agent stays reserved without a heartbeat')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help='Attempts an agent gets, counting the first, before it is marked failed')
+    sak_instrument.add_arguments(parser)
     args = parser.parse_args()
 
     if args.info:
@@ -104,11 +362,23 @@ def main():
           --list: Show all agents and their status
           --update ID --status STATUS: Update agent status
           --combine: Combine all completed outputs
+          --run-workers N: Run pending agents on N workers until the queue is empty
+            --pool thread|process: Worker pool type (default: thread)
+            --runner module:function: Task runner (default: functions:gpt4)
+            --lease SECONDS: Claim lease, renewed by heartbeats; expired claims are requeued (default: 60)
+            --max-attempts N: Give up on an agent after N attempts (default: 3)
+          --timings: Print time spent loading/saving state and running workers
+          --profile FILE: Write a cProfile dump
         Example:
           swiss-army-knife swarm-manager --create "Generate creative story"
+          swiss-army-knife swarm-manager --run-workers 8 --pool process
         """)
         return
 
+    with sak_instrument.instrument(args):
+        run(args)
+
+def run(args):
     manager = SwarmManager()
 
     if args.create:
@@ -122,16 +392,29 @@ def main():
             print(f"Task: {agent['task']}")
             print(f"Status: {agent['status']}")
             print(f"Started: {agent['start_time']}")
-            if agent['completion_time'] != 'None':
+            if agent['completion_time']:
                 print(f"Completed: {agent['completion_time']}")
+            if agent['error']:
+                print(f"Error: {agent['error']}")
 
     elif args.update and args.status:
         manager.update_agent_status(args.update, args.status)
         print(f"Updated agent {args.update} status to {args.status}")
 
     elif args.combine:
-        manager.combine_outputs()
+        with span('combine'):
+            manager.combine_outputs()
         print("Combined all completed outputs into combined_output.txt")
 
+    elif args.run_workers:
+        started = time.perf_counter()
+        with span('run_workers'):
+            counts = run_workers(manager, args.run_workers, args.pool, args.runner, args.lease, args.max_attempts)
+        elapsed = time.perf_counter() - started
+        finished = counts["completed"] + counts["failed"]
+        print(f"Ran {finished} agents in {elapsed:.2f}s ({finished / elapsed if elapsed else 0:.1f} agents/s): "
+              f"{counts['completed']} completed, {counts['failed']} failed, {counts['requeued']} requeued, "
+              f"{counts['lost']} superseded after lease expiry")
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
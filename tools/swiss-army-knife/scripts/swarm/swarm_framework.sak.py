@@ -3,10 +3,16 @@ import asyncio
 import json
 import uuid
 import os
+import sys
+from pathlib import Path
 from typing import List, Dict, Any
 from datetime import datetime
 from functions import gpt4
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+import sak_instrument
+from sak_instrument import span
+
 class Message:
     def __init__(self, sender: str, content: str, task_id: str):
         self.sender = sender
@@ -42,13 +48,14 @@ class MessageBoard:
             json.dump([msg.to_dict() for msg in self.messages], f)
 
     def post_message(self, message: Message):
-        self.messages.append(message)
-        self.save_messages()
-        
-        filename = f"{message.task_id}_{message.sender}_{message.timestamp}.txt"
-        filepath = os.path.join(self.storage_path, filename)
-        with open(filepath, 'w') as f:
-            f.write(message.content)
+        with span('save'):
+            self.messages.append(message)
+            self.save_messages()
+
+            filename = f"{message.task_id}_{message.sender}_{message.timestamp}.txt"
+            filepath = os.path.join(self.storage_path, filename)
+            with open(filepath, 'w') as f:
+                f.write(message.content)
         return filepath
 
     def get_messages(self, task_id: str = None) -> List[Message]:
@@ -62,12 +69,13 @@ class SwarmManager:
         self.active_tasks: Dict[str, Dict[str, Any]] = {}
 
     async def execute_agent_task(self, task: str, task_id: str, agent_id: str):
-        response = gpt4(
-            prompt=task,
-            temperature=0.7,
-            system_message=f"You are Agent {agent_id} in the swarm. Complete your assigned subtask efficiently."
-        )
-        
+        with span('agent'):
+            response = gpt4(
+                prompt=task,
+                temperature=0.7,
+                system_message=f"You are Agent {agent_id} in the swarm. Complete your assigned subtask efficiently."
+            )
+
         filepath = self.message_board.post_message(
             Message(f"agent_{agent_id}", response['response'], task_id)
         )
@@ -87,18 +95,20 @@ class SwarmManager:
             for i, subtask in enumerate(subtasks)
         ]
         
-        results = await asyncio.gather(*tasks)
-        
+        with span('agents'):
+            results = await asyncio.gather(*tasks)
+
         synthesis_prompt = f"""Main task: {main_task}
 Results from agents:
 {json.dumps([r['response'] for r in results], indent=2)}
 Synthesize these results into a complete solution."""
 
-        final_result = gpt4(
-            prompt=synthesis_prompt,
-            temperature=0.5,
-            system_message="You are the swarm manager. Create a cohesive solution."
-        )
+        with span('synthesis'):
+            final_result = gpt4(
+                prompt=synthesis_prompt,
+                temperature=0.5,
+                system_message="You are the swarm manager. Create a cohesive solution."
+            )
 
         final_filepath = self.message_board.post_message(
             Message("manager", final_result['response'], task_id)
@@ -119,7 +129,8 @@ def main():
     parser.add_argument('--subtasks', nargs='+', help='List of subtasks')
     parser.add_argument('--list-tasks', action='store_true', help='List all tasks')
     parser.add_argument('--get-messages', type=str, help='Get messages for task ID')
-    
+    sak_instrument.add_arguments(parser)
+
     args = parser.parse_args()
 
     if args.info:
@@ -131,13 +142,21 @@ def main():
         swiss-army-knife swarm_framework --task "main task" --subtasks "subtask1" "subtask2"
         swiss-army-knife swarm_framework --list-tasks
         swiss-army-knife swarm_framework --get-messages <task_id>
+
+        Add --timings to see time spent per agent, in synthesis and saving outputs,
+        or --profile FILE for a cProfile dump.
         
         Outputs saved to: E:/Artificial Intelligence/MCP/swiss-army-files/swarm_outputs/
         """)
         return
 
-    manager = SwarmManager()
-    
+    with sak_instrument.instrument(args):
+        run(args)
+
+def run(args):
+    with span('load'):
+        manager = SwarmManager()
+
     if args.task and args.subtasks:
         result = asyncio.run(manager.execute_task(args.task, args.subtasks))
         print(json.dumps(result, indent=2))
@@ -0,0 +1,150 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+
+HERE = Path(__file__).resolve().parent
+_spec = importlib.util.spec_from_file_location('swarm_manager', HERE / 'swarm-manager.sak.py')
+swarm_manager = importlib.util.module_from_spec(_spec)
+# Registered so process pools can pickle execute_agent by reference
+sys.modules[_spec.name] = swarm_manager
+_spec.loader.exec_module(swarm_manager)
+
+# Fake runners, resolved by --runner as test_swarm_manager:<name>
+
+def echo(task):
+    return f"done: {task}"
+
+def fail_odd(task):
+    if int(task.split()[-1]) % 2:
+        return {"response": f"cannot do {task}", "status": "error"}
+    return echo(task)
+
+def crash_once(task):
+    """Kill the worker process the first time a task naming a marker file runs."""
+    if task.startswith("crash "):
+        marker = Path(task.split(" ", 1)[1])
+        try:
+            marker.touch(exist_ok=False)
+        except FileExistsError:
+            return echo(task)
+        os._exit(1)
+    time.sleep(0.01)
+    return echo(task)
+
+def crash_always(task):
+    if task == "crash":
+        os._exit(1)
+    return echo(task)
+
+@pytest.fixture
+def manager(tmp_path):
+    return swarm_manager.SwarmManager(tmp_path / "swarm_state.json")
+
+def _statuses(manager):
+    manager.load_state()
+    return {agent.agent_id: agent.status for agent in manager.agents.values()}
+
+def test_thread_pool_runs_every_agent(manager, tmp_path):
+    for n in range(20):
+        manager.create_agent(f"task {n}")
+
+    counts = swarm_manager.run_workers(manager, 4, "thread", "test_swarm_manager:fail_odd")
+
+    assert counts == {"completed": 10, "failed": 10, "lost": 0, "requeued": 0}
+    manager.load_state()
+    for agent in manager.agents.values():
+        n = agent.agent_id - 1
+        assert agent.status == ("failed" if n % 2 else "completed")
+        assert agent.attempts == 1 and agent.worker is None
+        assert (tmp_path / agent.output_file).read_text() == (
+            f"cannot do task {n}" if n % 2 else f"done: task {n}")
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_claims_are_exclusive_across_processes(manager):
+    for n in range(40):
+        manager.create_agent(f"task {n}")
+
+    counts = swarm_manager.run_workers(manager, 6, "process", "test_swarm_manager:echo")
+
+    assert counts["completed"] == 40
+    manager.load_state()
+    assert all(agent.attempts == 1 for agent in manager.agents.values())
+
+def test_crashed_process_pool_requeues_its_agents(manager, tmp_path):
+    for n in range(20):
+        manager.create_agent(f"crash {tmp_path / 'crashed'}" if n == 2 else f"task {n}")
+
+    started = time.perf_counter()
+    counts = swarm_manager.run_workers(manager, 4, "process", "test_swarm_manager:crash_once")
+
+    # Well under the lease: requeueing doesn't wait for expiry, nor for locks the killed workers held
+    assert time.perf_counter() - started < 10
+    assert set(_statuses(manager).values()) == {"completed"}
+    assert counts["completed"] == 20 and counts["requeued"] >= 1
+    assert manager.agents[3].attempts == 2
+
+def test_agent_fails_after_max_attempts(manager):
+    manager.create_agent("crash")
+    for n in range(5):
+        manager.create_agent(f"task {n}")
+
+    counts = swarm_manager.run_workers(manager, 2, "process", "test_swarm_manager:crash_always", max_attempts=2)
+
+    manager.load_state()
+    assert manager.agents[1].status == "failed" and manager.agents[1].attempts == 2
+    assert "worker crashed" in manager.agents[1].error
+    # Agents running beside the crash are charged an attempt too, so some may fail with it
+    assert counts["completed"] + counts["failed"] == 6 and counts["completed"] >= 4
+    assert "running" not in _statuses(manager).values()
+
+class BreaksOnFirstSubmit(ThreadPoolExecutor):
+    """Stands in for a process pool whose child died between wait() calls."""
+
+    submits = 0
+
+    def submit(self, *args, **kwargs):
+        type(self).submits += 1
+        if type(self).submits == 1:
+            raise BrokenProcessPool("A child process terminated abruptly")
+        return super().submit(*args, **kwargs)
+
+def test_submit_to_broken_pool_requeues_the_claim(manager, monkeypatch):
+    monkeypatch.setattr(swarm_manager, "ProcessPoolExecutor", BreaksOnFirstSubmit)
+    for n in range(3):
+        manager.create_agent(f"task {n}")
+
+    counts = swarm_manager.run_workers(manager, 2, "process", "test_swarm_manager:echo")
+
+    assert counts == {"completed": 3, "failed": 0, "lost": 0, "requeued": 1}
+    assert set(_statuses(manager).values()) == {"completed"}
+    assert manager.agents[1].attempts == 2
+
+def test_expired_lease_is_requeued_and_stale_claim_rejected(manager):
+    manager.create_agent("task")
+    stale = manager.claim("dead-worker", lease=-1)
+    fresh = manager.claim("live-worker")
+
+    assert fresh.agent_id == stale.agent_id and fresh.attempts == 2
+    assert not manager.heartbeat(stale.agent_id, stale.worker)
+    assert not manager.finish(stale.agent_id, stale.worker, "completed", output="stale")
+    assert manager.finish(fresh.agent_id, fresh.worker, "completed", output="fresh")
+    assert (manager.state_file.parent / fresh.output_file).read_text() == "fresh"
+
+def test_run_workers_cli_reports_throughput(tmp_path):
+    script = str(HERE / "swarm-manager.sak.py")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(HERE), os.environ.get("PYTHONPATH")])))
+    for n in range(5):
+        subprocess.run([sys.executable, script, "--create", f"task {n}"], cwd=tmp_path, env=env, check=True,
+                       capture_output=True)
+
+    result = subprocess.run([sys.executable, script, "--run-workers", "3", "--runner", "test_swarm_manager:echo"],
+                            cwd=tmp_path, env=env, check=True, capture_output=True, text=True)
+    assert "Ran 5 agents" in result.stdout and "5 completed" in result.stdout
+    assert (tmp_path / "agent_5_output.txt").read_text() == "done: task 4"
@@ -0,0 +1,102 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import transform_excel
+import transform_filter
+import transform_io
+import transform_sql
+
+RECORDS = [
+    {'id': 1, 'name': 'ann', 'score': 9.5, 'v': 9, 'active': True},
+    {'id': 2, 'name': "o'neil", 'score': None, 'v': None, 'active': False},
+    {'id': 3, 'name': 'cid', 'score': 4.25, 'v': 5, 'active': None},
+]
+
+def _expected(record):
+    # SQLite stores booleans as integers
+    return {key: int(value) if isinstance(value, bool) else value for key, value in record.items()}
+
+def test_sqlite_round_trip_types_and_indexes(tmp_path):
+    path = str(tmp_path / 'people.db')
+    assert transform_sql.write_sqlite(iter(RECORDS), path, index=['name', 'v,id']) == len(RECORDS)
+
+    conn = sqlite3.connect(path)
+    try:
+        assert transform_sql.table_columns(conn, 'people') == {
+            'id': 'INTEGER', 'name': 'TEXT', 'score': 'REAL', 'v': 'INTEGER', 'active': 'INTEGER'}
+        indexes = {row[0]: row[1] for row in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'people'")}
+    finally:
+        conn.close()
+    assert sorted(indexes) == ['idx_people_name', 'idx_people_v_id']
+    assert indexes['idx_people_v_id'].endswith('("v", "id")')
+
+    assert list(transform_sql.read_sqlite(path)) == [_expected(record) for record in RECORDS]
+
+def test_sqlite_if_exists(tmp_path):
+    path = str(tmp_path / 'people.db')
+    transform_sql.write_sqlite(iter(RECORDS), path)
+    transform_sql.write_sqlite(iter(RECORDS[:1]), path, if_exists='append')
+    assert len(list(transform_sql.read_sqlite(path))) == len(RECORDS) + 1
+    with pytest.raises(ValueError, match='already exists'):
+        transform_sql.write_sqlite(iter(RECORDS), path, if_exists='fail')
+    transform_sql.write_sqlite(iter(RECORDS[:1]), path)
+    assert len(list(transform_sql.read_sqlite(path))) == 1
+
+def test_sqlite_read_streams_with_fetchmany(tmp_path, monkeypatch):
+    path = str(tmp_path / 'many.db')
+    transform_sql.write_sqlite(({'n': n} for n in range(25)), path)
+
+    monkeypatch.setattr(transform_io, 'CHUNK_SIZE', 10)
+    stats = SimpleNamespace(records_in=0)
+    records = transform_sql.read_sqlite(path, stats=stats)
+    assert next(records) == {'n': 0}
+    # Only the first batch has been fetched
+    assert stats.records_in == 10
+    assert [record['n'] for record in records] == list(range(1, 25))
+    assert stats.records_in == 25
+
+@pytest.mark.parametrize('expr', ['v > 6', 'not (v > 6)', 'name contains e or v = 5', 'not (v != 5)',
+                                  'id in (1, 3) and not score < 5', 'v = null'])
+def test_sqlite_filter_pushdown_matches_predicate(tmp_path, expr):
+    path = str(tmp_path / 'people.db')
+    transform_sql.write_sqlite(iter(RECORDS), path)
+    where = transform_filter.Filter(expr)
+    expected = [_expected(record) for record in filter(where.predicate(RECORDS), RECORDS)]
+
+    stats = SimpleNamespace(records_in=0)
+    assert list(transform_sql.read_sqlite(path, where=where, stats=stats)) == expected
+    # Non-matching rows never leave SQLite
+    assert stats.records_in == len(expected)
+
+def test_sqlite_filter_type_errors(tmp_path):
+    path = str(tmp_path / 'people.db')
+    transform_sql.write_sqlite(iter(RECORDS), path)
+    with pytest.raises(transform_filter.FilterError, match='numeric'):
+        list(transform_sql.read_sqlite(path, where=transform_filter.Filter('v > abc')))
+    with pytest.raises(transform_filter.FilterError, match='Unknown field'):
+        list(transform_sql.read_sqlite(path, where=transform_filter.Filter('missing = 1')))
+
+def test_sql_dump_round_trip(tmp_path):
+    path = str(tmp_path / 'people.sql')
+    transform_sql.write_sql_dump(iter(RECORDS), path, index=['name'])
+    assert list(transform_sql.read_sql_dump(path)) == [_expected(record) for record in RECORDS]
+    where = transform_filter.Filter('v >= 5')
+    assert [record['id'] for record in transform_sql.read_sql_dump(path, where=where)] == [1, 3]
+
+def test_excel_round_trip(tmp_path):
+    pytest.importorskip('openpyxl')
+    path = str(tmp_path / 'people.xlsx')
+    records = RECORDS + [{'id': 4, 'name': 'dee', 'tags': ['a', 'b']}]
+    assert transform_excel.write_excel(iter(records), path, sheet='People') == len(records)
+
+    read = list(transform_excel.read_excel(path, sheet='People'))
+    assert [record['id'] for record in read] == [1, 2, 3, 4]
+    assert read[0] == {**RECORDS[0], 'tags': None}
+    assert read[1]['score'] is None
+    # Lists are stored as JSON text
+    assert read[3]['tags'] == '["a", "b"]'
+    with pytest.raises(ValueError, match='Sheet'):
+        list(transform_excel.read_excel(path, sheet='Nope'))
@@ -0,0 +1,208 @@
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+import sak_instrument
+from sak_instrument import span
+
+try:
+    import transform_agg
+    import transform_batch
+    import transform_filter
+    import transform_io
+    import transform_pipeline
+    MODULES_AVAILABLE = True
+except ImportError:
+    MODULES_AVAILABLE = False
+
+def reader_options(args):
+    return {'delimiter': args.delimiter, 'record_tag': args.record_tag, 'pattern': args.pattern,
+            'infer': not args.no_infer, 'table': args.table, 'sheet': args.sheet}
+
+def writer_options(args):
+    return {'delimiter': args.delimiter, 'record_tag': args.record_tag, 'table': args.table,
+            'index': args.index, 'if_exists': args.if_exists, 'sheet': args.sheet}
+
+def run_batch(args):
+    try:
+        output_format = args.output_format.lower() if args.output_format else None
+        if output_format and output_format not in transform_io.WRITERS:
+            raise ValueError(f"Unsupported format: {output_format}")
+        where = transform_filter.Filter(args.filter) if args.filter else None
+        aggregates = transform_agg.parse_aggregates(args.agg) if args.agg else None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if not os.path.isdir(args.input):
+        print(f"Error: {args.input} is not a directory")
+        return
+
+    run_options = {
+        'where': where,
+        'fields': [field.strip() for field in args.select.split(',')] if args.select else None,
+        'reader_options': reader_options(args),
+        'writer_options': writer_options(args),
+        'group_by': [field.strip() for field in args.group_by.split(',')] if args.group_by else None,
+        'aggregates': aggregates,
+        'memory_bytes': args.memory_budget * 1024 * 1024,
+    }
+    delta_output = args.delta_output or os.path.join(args.output, 'delta.jsonl')
+    started = time.perf_counter()
+    try:
+        with span('batch'):
+            summary = transform_batch.run_batch(args.input, args.output, output_format, run_options,
+                                                args.delta, delta_output if args.delta else None, args.key,
+                                                args.workers)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    elapsed = time.perf_counter() - started
+    print(f"{summary['added']} added, {summary['changed']} changed, {summary['unchanged']} unchanged, "
+          f"{summary['removed']} removed files; {summary['records_out']} of {summary['records_in']} records "
+          f"in {elapsed:.2f}s")
+    if args.delta:
+        print(f"Wrote {summary['delta_records']} record changes to {delta_output}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--info', action='store_true', help='Show script information')
+    parser.add_argument('input', nargs='?', help='Input file (directory with --batch)')
+    parser.add_argument('output', nargs='?', help='Output file (directory with --batch)')
+    parser.add_argument('--from', dest='input_format', help='Input format (default: from file extension)')
+    parser.add_argument('--to', dest='output_format', help='Output format (default: from file extension)')
+    parser.add_argument('--filter', help='Filter data (e.g., "age>25", "name contains John")')
+    parser.add_argument('--select', help='Comma-separated list of fields to keep')
+    parser.add_argument('--group-by', help='Comma-separated fields to group by')
+    parser.add_argument('--agg', help='Aggregations, e.g. "sum:amount,avg:price,count"')
+    parser.add_argument('--memory-budget', type=int, default=transform_agg.DEFAULT_MEMORY_MB if MODULES_AVAILABLE else 256,
+                        help='MB of group state to hold before spilling to disk (default: 256)')
+    parser.add_argument('--workers', type=int,
+                        help='Aggregate shards of a CSV/JSONL/TXT input in this many processes '
+                             '(with --batch: files transformed in parallel, default: CPU count)')
+    parser.add_argument('--batch', action='store_true', help='Transform every file in the input directory')
+    parser.add_argument('--delta', metavar='MANIFEST',
+                        help='With --batch: skip unchanged files and write record changes since the last run')
+    parser.add_argument('--delta-output', help='Where to write record changes (default: OUTPUT/delta.jsonl)')
+    parser.add_argument('--key', help='With --delta: field identifying a record across runs')
+    parser.add_argument('--delimiter', default=',', help='CSV field delimiter')
+    parser.add_argument('--record-tag', help='XML element that holds one record')
+    parser.add_argument('--pattern', help='TXT regex; named groups become fields')
+    parser.add_argument('--no-infer', action='store_true', help='Keep text fields as strings')
+    parser.add_argument('--table', help='SQLite/SQL table to read or write (default: the only table / file name)')
+    parser.add_argument('--index', action='append', metavar='COLUMNS',
+                        help='SQLite/SQL output: create an index on these comma-separated columns after loading '
+                             '(repeatable)')
+    parser.add_argument('--if-exists', choices=['replace', 'append', 'fail'], default='replace',
+                        help='SQLite output: what to do when the table already exists (default: replace)')
+    parser.add_argument('--sheet', help='Excel worksheet to read or write')
+    sak_instrument.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.info:
+        print("""
+Tool Name: Advanced Data Transformer 2.0
+Description: Transform data between formats with filtering and aggregation
+Usage: swiss-army-knife transform input_file output_file [options]
+
+Supported formats:
+- JSON (arrays streamed incrementally; JSON Lines as .jsonl/.ndjson)
+- CSV (with header management)
+- YAML (with aliases support)
+- XML (streamed with iterparse)
+- TXT (with pattern matching)
+- SQLite databases (.db/.sqlite; bulk-loaded in one transaction, filters pushed into SQL)
+- SQL dumps (.sql; multi-row INSERT scripts)
+- Excel (.xlsx; streamed in read-only / write-only mode)
+
+Features:
+- Streaming conversion in constant memory, for files larger than RAM
+- Intelligent format conversion
+- Advanced data filtering, compiled once and pushed down into CSV reads
+- Column/field selection
+- Dynamic grouping and aggregation, spilling to disk past a memory budget
+- Smart type inference
+- Throughput reporting in records/s
+- Parallel batch processing of directories, with incremental delta manifests
+
+Options:
+  --filter EXPR    Filter data (e.g., "age>25", "name contains John")
+                   Operators: = != > >= < <= contains startswith endswith in (a, b)
+                   Combine with and, or, not and parentheses
+  --select FIELDS  Comma-separated list of fields to keep
+  --group-by FIELD Group data by field (comma-separated for several)
+  --agg FUNC       Aggregations: count, count:field, sum:field, avg:field, min:field, max:field
+  --memory-budget MB  Group state held in memory before spilling to disk (default: 256)
+  --workers N      Aggregate a CSV/JSONL/TXT input in N processes
+  --batch          Treat input and output as directories; files are transformed in
+                   parallel (--workers, default: CPU count) and written atomically
+  --delta MANIFEST With --batch: skip files unchanged since the last run and write
+                   added/changed/removed records to OUTPUT/delta.jsonl
+  --delta-output FILE  Write record changes here instead
+  --key FIELD      With --delta: field identifying a record (default: whole-record hash)
+  --from FORMAT    Input format when the extension is ambiguous
+  --to FORMAT      Output format when the extension is ambiguous
+  --delimiter CHAR CSV field delimiter (default: ,)
+  --record-tag TAG XML element that holds one record
+  --pattern REGEX  TXT pattern; named groups become fields
+  --no-infer       Keep text fields as strings
+  --table NAME     SQLite/SQL table to read or write (default: the only table / file name)
+  --index COLUMNS  Index to build after loading SQLite/SQL output (repeatable)
+  --if-exists MODE SQLite output table exists: replace, append or fail (default: replace)
+  --sheet NAME     Excel worksheet to read or write
+  --timings        Print time and peak memory per phase (transform, spill, merge)
+  --profile FILE   Write a cProfile dump (- prints the top functions)
+
+Examples:
+  swiss-army-knife transform data.csv output.json
+  swiss-army-knife transform data.json out.csv --filter "age>25"
+  swiss-army-knife transform data.csv out.jsonl --filter "age>=18 and (city = 'New York' or status in (gold, platinum))"
+  swiss-army-knife transform data.csv out.json --select "name,age"
+  swiss-army-knife transform data.json out.json --group-by "category" --agg "sum:amount"
+  swiss-army-knife transform sales.jsonl totals.csv --group-by "region,sku" --agg "count,sum:amount,avg:price" --workers 8
+  swiss-army-knife transform events.jsonl events.db --table events --index user_id --index "day,kind"
+  swiss-army-knife transform events.db recent.xlsx --table events --filter "day >= '2024-01-01'"
+  swiss-army-knife transform raw/ clean/ --batch --to jsonl --delta state.json --key id
+  swiss-army-knife transform access.log hits.jsonl --from txt --pattern "(?P<ip>\\S+) .* (?P<status>\\d{3}) "
+        """)
+        return
+
+    if not args.input or not args.output or not MODULES_AVAILABLE:
+        parser.print_help()
+        return
+
+    with sak_instrument.instrument(args):
+        if args.batch:
+            run_batch(args)
+        else:
+            run(args)
+
+def run(args):
+    try:
+        input_format = transform_io.detect_format(args.input, args.input_format)
+        output_format = transform_io.detect_format(args.output, args.output_format)
+        where = transform_filter.Filter(args.filter) if args.filter else None
+        aggregates = transform_agg.parse_aggregates(args.agg) if args.agg else None
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    fields = [field.strip() for field in args.select.split(',')] if args.select else None
+    group_by = [field.strip() for field in args.group_by.split(',')] if args.group_by else None
+
+    try:
+        with span('transform'):
+            stats = transform_pipeline.run(args.input, args.output, input_format, output_format,
+                                           where, fields, reader_options(args), writer_options(args),
+                                           group_by, aggregates, args.memory_budget * 1024 * 1024,
+                                           args.workers or 1)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    print(stats.summary())
+    print(f"Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
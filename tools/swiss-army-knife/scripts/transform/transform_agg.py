@@ -0,0 +1,281 @@
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import transform_io
+
+try:
+    from sak_instrument import span
+except ImportError:
+    # Imported as a library, without the sys.path entry transform.sak.py adds
+    def span(name: str):
+        return nullcontext()
+
+AGGREGATES = ('count', 'sum', 'avg', 'min', 'max')
+DEFAULT_MEMORY_MB = 256
+PARTITIONS = 32
+# Groups sampled when estimating the in-memory cost of the hash table
+_SIZE_SAMPLE = 256
+
+def parse_aggregates(spec: str) -> List[Tuple[str, Optional[str]]]:
+    """Parse 'sum:amount,avg:price,count' into [(func, field), ...]."""
+    aggregates = []
+    for part in spec.split(','):
+        func, _, field = part.strip().partition(':')
+        func = func.lower()
+        if func not in AGGREGATES:
+            raise ValueError(f"Unknown aggregation '{func}' (expected one of: {', '.join(AGGREGATES)})")
+        if func != 'count' and not field:
+            raise ValueError(f"Aggregation '{func}' needs a field, e.g. {func}:amount")
+        aggregates.append((func, field or None))
+    return aggregates
+
+def output_name(func: str, field: Optional[str]) -> str:
+    return f"{func}_{field}" if field else func
+
+def _partition(key: Tuple, salt: int, partitions: int) -> int:
+    # crc32 of repr is stable across processes, unlike hash() under hash randomization
+    return zlib.crc32(f"{salt}:{key!r}".encode()) % partitions
+
+def _deep_size(value) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+def _state_error(func: str, field: str, value, state) -> ValueError:
+    if func in ('sum', 'avg'):
+        return ValueError(f"Cannot {func} field '{field}': {value!r} is not a number")
+    return ValueError(f"Cannot {func} field '{field}': {value!r} does not compare with {state!r}")
+
+def _key_error(group_by: List[str], key: Tuple) -> ValueError:
+    for field, value in zip(group_by, key):
+        try:
+            hash(value)
+        except TypeError:
+            return ValueError(f"Cannot group by field '{field}': {value!r} is a nested value")
+    return ValueError(f"Cannot group by {', '.join(group_by)}: {key!r} is not hashable")
+
+class HashAggregator:
+    """Streaming GROUP BY with mergeable partial states.
+
+    Each group holds a flat list of partial states: count -> n, sum -> total,
+    avg -> (total, n), min/max -> value. When the table's estimated size
+    passes memory_bytes, it is hash-partitioned to temporary files and
+    cleared; results() merges the partitions one at a time, re-partitioning
+    any that are still too large.
+    """
+
+    def __init__(self, group_by: List[str], aggregates: List[Tuple[str, Optional[str]]],
+                 memory_bytes: int = DEFAULT_MEMORY_MB * 1024 * 1024, spill_dir: Optional[str] = None,
+                 partitions: int = PARTITIONS, salt: int = 0):
+        self.group_by = group_by
+        self.aggregates = aggregates
+        self.memory_bytes = memory_bytes
+        self.partitions = partitions
+        self.salt = salt
+        self.table = {}
+        self.spill_dir = spill_dir
+        self._own_spill_dir = False
+        self.spills = 0
+        self._group_bytes = None
+        self._check_at = _SIZE_SAMPLE
+
+        # (func, field, index of its first state slot); avg uses two slots
+        self._slots = []
+        slot = 0
+        for func, field in aggregates:
+            self._slots.append((func, field, slot))
+            slot += 2 if func == 'avg' else 1
+
+    def _new_states(self) -> List:
+        states = []
+        for func, _ in self.aggregates:
+            states.extend((0, 0) if func == 'avg' else (0,) if func in ('count', 'sum') else (None,))
+        return states
+
+    def add(self, record: Dict) -> None:
+        key = tuple(record.get(field) for field in self.group_by)
+        try:
+            states = self.table.get(key)
+        except TypeError:
+            raise _key_error(self.group_by, key) from None
+        if states is None:
+            # Check before inserting: a spill clears the table
+            if len(self.table) >= self._check_at:
+                self._check_memory()
+            states = self.table[key] = self._new_states()
+        for func, field, slot in self._slots:
+            if func == 'count':
+                if field is None or record.get(field) is not None:
+                    states[slot] += 1
+                continue
+            value = record.get(field)
+            if value is None:
+                continue
+            try:
+                if func == 'sum':
+                    states[slot] += value
+                elif func == 'avg':
+                    states[slot] += value
+                    states[slot + 1] += 1
+                elif func == 'min':
+                    if states[slot] is None or value < states[slot]:
+                        states[slot] = value
+                elif states[slot] is None or value > states[slot]:
+                    states[slot] = value
+            except TypeError:
+                raise _state_error(func, field, value, states[slot]) from None
+
+    def merge(self, key: Tuple, other: List) -> None:
+        """Fold another partial state for key into the table."""
+        states = self.table.get(key)
+        if states is None:
+            if len(self.table) >= self._check_at:
+                self._check_memory()
+            self.table[key] = list(other)
+            return
+        for func, field, slot in self._slots:
+            try:
+                if func in ('count', 'sum'):
+                    states[slot] += other[slot]
+                elif func == 'avg':
+                    states[slot] += other[slot]
+                    states[slot + 1] += other[slot + 1]
+                elif other[slot] is not None and (states[slot] is None or
+                                                  (other[slot] < states[slot] if func == 'min' else other[slot] > states[slot])):
+                    states[slot] = other[slot]
+            except TypeError:
+                raise _state_error(func, field, other[slot], states[slot]) from None
+
+    def consume(self, records: Iterable[Dict]) -> 'HashAggregator':
+        for record in records:
+            self.add(record)
+        return self
+
+    def _check_memory(self) -> None:
+        if self._group_bytes is None:
+            sample = list(self.table.items())[:_SIZE_SAMPLE]
+            # Per-entry dict overhead is roughly 100 bytes on CPython
+            self._group_bytes = 100 + sum(_deep_size(key) + _deep_size(states) for key, states in sample) // len(sample)
+        if len(self.table) * self._group_bytes > self.memory_bytes:
+            self.spill()
+        self._check_at = len(self.table) + _SIZE_SAMPLE
+
+    def _partition_path(self, partition: int) -> str:
+        return os.path.join(self.spill_dir, f"part-{self.salt}-{partition:04d}.pkl")
+
+    def spill(self) -> List[str]:
+        """Append the table to per-partition files and clear it; returns the partition paths."""
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='transform-agg-')
+            self._own_spill_dir = True
+        with span('spill'):
+            buckets = [[] for _ in range(self.partitions)]
+            for item in self.table.items():
+                buckets[_partition(item[0], self.salt, self.partitions)].append(item)
+            self.table.clear()
+            self._check_at = _SIZE_SAMPLE
+
+            paths = []
+            for partition, items in enumerate(buckets):
+                path = self._partition_path(partition)
+                paths.append(path)
+                if items:
+                    with open(path, 'ab') as f:
+                        pickle.dump(items, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.spills += 1
+        return paths
+
+    def results(self) -> Iterator[Dict]:
+        """Yield one output record per group, then remove any spill files."""
+        try:
+            if not self.spills:
+                for key, states in self.table.items():
+                    yield self._finalize(key, states)
+                return
+            self.spill()
+            yield from merge_partitions([[self._partition_path(p)] for p in range(self.partitions)],
+                                        self.group_by, self.aggregates, self.memory_bytes, self.salt + 1)
+        finally:
+            self.table.clear()
+            if self._own_spill_dir:
+                shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def _finalize(self, key: Tuple, states: List) -> Dict:
+        record = dict(zip(self.group_by, key))
+        for func, field, slot in self._slots:
+            if func == 'avg':
+                value = states[slot] / states[slot + 1] if states[slot + 1] else None
+            else:
+                value = states[slot]
+            record[output_name(func, field)] = value
+        return record
+
+def _read_partition(path: str) -> Iterator[Tuple[Tuple, List]]:
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield from pickle.load(f)
+            except EOFError:
+                return
+
+def merge_partitions(partitions: List[List[str]], group_by: List[str], aggregates: List[Tuple[str, Optional[str]]],
+                     memory_bytes: int, salt: int) -> Iterator[Dict]:
+    """Merge each partition's files (from one or many aggregators) and yield final records."""
+    for paths in partitions:
+        merged = HashAggregator(group_by, aggregates, memory_bytes, salt=salt)
+        with span('merge'):
+            for path in paths:
+                for key, states in _read_partition(path):
+                    merged.merge(key, states)
+        yield from merged.results()
+
+def _aggregate_shard(task) -> Tuple[int, str]:
+    (path, input_format, start, end, reader_options, where, group_by, aggregates,
+     memory_bytes, spill_dir) = task
+    import transform_pipeline
+
+    stats = transform_pipeline.PipelineStats()
+    records = transform_pipeline.count_stage(
+        transform_io.read_shard(path, input_format, start, end, **reader_options), stats, 'records_in')
+    if where is not None:
+        records = transform_pipeline.filter_stage(records, where)
+
+    aggregator = HashAggregator(group_by, aggregates, memory_bytes, tempfile.mkdtemp(dir=spill_dir))
+    aggregator.consume(records).spill()
+    return stats.records_in, aggregator.spill_dir
+
+def aggregate_parallel(path: str, input_format: str, group_by: List[str], aggregates: List[Tuple[str, Optional[str]]],
+                       workers: int, memory_bytes: int, where=None, reader_options: Optional[Dict] = None,
+                       stats=None) -> Iterator[Dict]:
+    """Aggregate byte-range shards of a line-oriented file in a process pool.
+
+    Each worker spills its partial states into the shared partition layout;
+    the parent then merges partition by partition, so no process holds more
+    than its share of memory_bytes.
+    """
+    spill_dir = tempfile.mkdtemp(prefix='transform-agg-')
+    try:
+        shards = transform_io.shard_ranges(path, input_format, workers)
+        tasks = [(path, input_format, start, end, reader_options or {}, where, group_by, aggregates,
+                  memory_bytes // workers, spill_dir) for start, end in shards]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_aggregate_shard, tasks))
+
+        if stats is not None:
+            stats.records_in += sum(scanned for scanned, _ in results)
+        worker_dirs = [directory for _, directory in results]
+        partitions = [[os.path.join(directory, f"part-0-{p:04d}.pkl") for directory in worker_dirs]
+                      for p in range(PARTITIONS)]
+        yield from merge_partitions(partitions, group_by, aggregates, memory_bytes, salt=1)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import transform_io
+import transform_pipeline
+
+MANIFEST_VERSION = 1
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def record_hash(record: Dict) -> str:
+    encoded = json.dumps(record, sort_keys=True, default=str, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+def discover(input_dir: Path) -> List[Path]:
+    """Input files with a known format under input_dir, in a stable order."""
+    return sorted(path for path in input_dir.rglob('*')
+                  if path.is_file() and path.suffix.lower() in transform_io.FORMATS)
+
+def load_manifest(path: Optional[str]) -> Dict:
+    if path and Path(path).exists():
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+    return {'version': MANIFEST_VERSION, 'options': None, 'files': {}}
+
+def write_atomic_json(path: str, data) -> None:
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+class _RecordTracker:
+    """Hashes records on their way to the writer and writes delta entries against the previous run."""
+
+    def __init__(self, relative: str, previous: Dict[str, str], key_field: Optional[str], delta_path: str):
+        self.relative = relative
+        self.previous = previous
+        self.key_field = key_field
+        self.delta_path = delta_path
+        self.records = {}
+
+    def __call__(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        with open(self.delta_path, 'w', encoding='utf-8') as delta:
+            for record in records:
+                digest = record_hash(record)
+                identity = str(record.get(self.key_field)) if self.key_field else digest
+                self.records[identity] = digest
+                old = self.previous.get(identity)
+                if old != digest:
+                    self._emit(delta, 'added' if old is None else 'changed', identity, record)
+                yield record
+            for identity in self.previous.keys() - self.records.keys():
+                self._emit(delta, 'removed', identity)
+
+    def _emit(self, delta, op: str, identity: str, record: Optional[Dict] = None) -> None:
+        entry = {'op': op, 'file': self.relative, 'key': identity}
+        if record is not None:
+            entry['record'] = record
+        delta.write(json.dumps(entry, default=str))
+        delta.write('\n')
+
+def _transform_file(task: Dict) -> Dict:
+    source, target = Path(task['source']), Path(task['target'])
+    previous = task['previous'] or {}
+    digest = file_hash(source) if task['track'] else None
+    if task['track'] and digest == previous.get('hash') and task['options_unchanged'] and target.exists():
+        return {'status': 'unchanged', 'hash': digest, 'records': previous.get('records', {}), 'delta': None,
+                'records_in': 0, 'records_out': 0}
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.', suffix='.tmp')
+    os.close(fd)
+    tracker = None
+    if task['track']:
+        fd, delta_path = tempfile.mkstemp(dir=task['scratch'], suffix='.jsonl')
+        os.close(fd)
+        tracker = _RecordTracker(task['relative'], previous.get('records', {}), task['key'], delta_path)
+
+    try:
+        stats = transform_pipeline.run(str(source), tmp, transform_io.detect_format(str(source)),
+                                       task['output_format'], tap=tracker, **task['run_options'])
+        os.replace(tmp, target)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return {'status': 'added' if not previous else 'changed', 'hash': digest,
+            'records': tracker.records if tracker else {}, 'delta': tracker.delta_path if tracker else None,
+            'records_in': stats.records_in, 'records_out': stats.records_out}
+
+def run_batch(input_dir: str, output_dir: str, output_format: Optional[str] = None, run_options: Optional[Dict] = None,
+              manifest_path: Optional[str] = None, delta_output: Optional[str] = None, key_field: Optional[str] = None,
+              workers: Optional[int] = None) -> Dict:
+    """Transform every file in input_dir into output_dir across a process pool.
+
+    With a manifest, files whose content hash and options match the last run
+    are skipped, and added/changed/removed records are written as JSON Lines
+    to delta_output, computed from per-record hashes stored in the manifest.
+    Outputs the last run wrote that this run no longer produces (removed
+    inputs, or a changed output format) are deleted. Two inputs mapping to
+    the same output is a ValueError. Returns counts per status plus record
+    totals.
+    """
+    input_dir, output_dir = Path(input_dir), Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    run_options = run_options or {}
+    track = manifest_path is not None
+    manifest = load_manifest(manifest_path)
+    # Filters serialize as their source text so the key is stable across runs
+    options_key = json.dumps({'format': output_format, 'key': key_field, **run_options}, sort_keys=True,
+                             default=lambda value: getattr(value, 'expr', str(value)))
+    options_unchanged = manifest.get('options') == options_key
+
+    tasks = []
+    targets = {}
+    for source in discover(input_dir):
+        relative = source.relative_to(input_dir).as_posix()
+        fmt = output_format or transform_io.detect_format(str(source))
+        suffix = next(ext for ext, name in transform_io.FORMATS.items() if name == fmt) \
+            if fmt in transform_io.FORMATS.values() else f'.{fmt}'
+        output = Path(relative).with_suffix(suffix).as_posix()
+        # Inputs sharing a stem (a.csv, a.json) would race to replace the same output
+        if output in targets:
+            raise ValueError(f"{targets[output]} and {relative} would both be written to {output_dir / output}")
+        targets[output] = relative
+        tasks.append({'source': str(source), 'target': str(output_dir / output), 'output': output,
+                      'relative': relative, 'output_format': fmt, 'run_options': run_options,
+                      'previous': manifest['files'].get(relative), 'track': track, 'key': key_field,
+                      'options_unchanged': options_unchanged})
+
+    scratch = tempfile.mkdtemp(prefix='transform-batch-')
+    for task in tasks:
+        task['scratch'] = scratch
+
+    summary = {'added': 0, 'changed': 0, 'unchanged': 0, 'removed': 0, 'records_in': 0, 'records_out': 0,
+               'delta_records': 0}
+    files = {}
+    delta = open(delta_output, 'w', encoding='utf-8') if track and delta_output else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            # map() yields in input order, so logs and the delta stream are deterministic
+            for task, result in zip(tasks, executor.map(_transform_file, tasks)):
+                summary[result['status']] += 1
+                summary['records_in'] += result['records_in']
+                summary['records_out'] += result['records_out']
+                print(f"{result['status']:>9}: {task['relative']} -> {task['target']}")
+                if track:
+                    files[task['relative']] = {'hash': result['hash'], 'output': task['output'],
+                                               'records': result['records']}
+                if result['delta']:
+                    with open(result['delta'], encoding='utf-8') as part:
+                        for line in part:
+                            summary['delta_records'] += 1
+                            if delta:
+                                delta.write(line)
+                    os.unlink(result['delta'])
+
+        if track:
+            for relative in manifest['files'].keys() - files.keys():
+                summary['removed'] += 1
+                print(f"  removed: {relative}")
+                for identity in manifest['files'][relative].get('records', {}):
+                    summary['delta_records'] += 1
+                    if delta:
+                        delta.write(json.dumps({'op': 'removed', 'file': relative, 'key': identity}))
+                        delta.write('\n')
+            for entry in manifest['files'].values():
+                stale = entry.get('output')
+                if stale and stale not in targets:
+                    (output_dir / stale).unlink(missing_ok=True)
+                    print(f"  deleted: {output_dir / stale}")
+            write_atomic_json(manifest_path, {'version': MANIFEST_VERSION, 'options': options_key, 'files': files})
+    finally:
+        if delta:
+            delta.close()
+        for leftover in Path(scratch).iterdir():
+            leftover.unlink()
+        os.rmdir(scratch)
+    return summary
@@ -0,0 +1,62 @@
+import json
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Records sampled for the header when no --select is given
+HEADER_SAMPLE = 1000
+
+def read_excel(path: str, sheet: Optional[str] = None, **options) -> Iterator[Dict]:
+    """Stream worksheet rows with openpyxl's read-only mode; the first row is the header.
+
+    Cells keep their Excel types (numbers, dates, booleans), so no inference
+    is applied. Blank rows are skipped.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet and sheet not in workbook.sheetnames:
+            raise ValueError(f"Sheet '{sheet}' not found in {path} (available: {', '.join(workbook.sheetnames)})")
+        rows = (workbook[sheet] if sheet else workbook.active).iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(name) if name is not None else f'column{i + 1}' for i, name in enumerate(header)]
+        width = len(header)
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            # Read-only mode drops trailing empty cells; fill them in as the CSV reader does
+            yield dict(zip(header, row)) if len(row) >= width else \
+                {name: row[i] if i < len(row) else None for i, name in enumerate(header)}
+    finally:
+        # Read-only workbooks keep the file open until closed
+        workbook.close()
+
+def _cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+def write_excel(records: Iterable[Dict], path: str, sheet: Optional[str] = None, fields: Optional[List[str]] = None,
+                **options) -> int:
+    """Write records with openpyxl's write-only mode, which streams rows to disk instead of building cells."""
+    from openpyxl import Workbook
+
+    records = iter(records)
+    sample = list(islice(records, HEADER_SAMPLE))
+    if not fields:
+        names = {}
+        for record in sample:
+            names.update(dict.fromkeys(record))
+        fields = list(names)
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet or 'Sheet1')
+    worksheet.append(fields)
+    count = 0
+    for record in chain(sample, records):
+        worksheet.append([_cell(record.get(field)) for field in fields])
+        count += 1
+    workbook.save(path)
+    return count
@@ -0,0 +1,393 @@
+import re
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import transform_io
+
+# Records sampled to infer field types before compiling a filter
+TYPE_SAMPLE = 1000
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<op>>=|<=|!=|==|=|>|<|\(|\)|,)
+      | (?P<word>[^\s()<>=!,"']+)
+    )''', re.VERBOSE)
+
+_COMPARISONS = {'=': '==', '==': '==', '!=': '!=', '>': '>', '>=': '>=', '<': '<', '<=': '<='}
+_TEXT_OPS = ('contains', 'startswith', 'endswith')
+_KEYWORDS = {'and', 'or', 'not', 'in'} | set(_TEXT_OPS)
+_NUMERIC = ('int', 'float')
+
+class FilterError(ValueError):
+    pass
+
+class Compare(NamedTuple):
+    field: str
+    op: str
+    value: object
+
+class BoolOp(NamedTuple):
+    op: str
+    operands: Tuple
+
+class Not(NamedTuple):
+    operand: object
+
+def _tokenize(expr: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        match = _TOKEN_RE.match(expr, pos)
+        if not match or match.end() == pos:
+            raise FilterError(f"Invalid filter expression at position {pos}: {expr}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+class _Parser:
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.tokens = _tokenize(expr)
+        self.pos = 0
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def keyword(self, *words) -> Optional[str]:
+        kind, text = self.peek()
+        if kind == 'word' and text.lower() in words:
+            self.pos += 1
+            return text.lower()
+        return None
+
+    def expect(self, op: str) -> None:
+        if self.peek() != ('op', op):
+            raise FilterError(f"Expected '{op}' in filter expression: {self.expr}")
+        self.pos += 1
+
+    def parse(self):
+        node = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise FilterError(f"Unexpected '{self.peek()[1]}' in filter expression: {self.expr}")
+        return node
+
+    def parse_or(self):
+        operands = [self.parse_and()]
+        while self.keyword('or'):
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else BoolOp('or', tuple(operands))
+
+    def parse_and(self):
+        operands = [self.parse_unary()]
+        while self.keyword('and'):
+            operands.append(self.parse_unary())
+        return operands[0] if len(operands) == 1 else BoolOp('and', tuple(operands))
+
+    def parse_unary(self):
+        if self.keyword('not'):
+            return Not(self.parse_unary())
+        if self.peek() == ('op', '('):
+            self.pos += 1
+            node = self.parse_or()
+            self.expect(')')
+            return node
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> Compare:
+        kind, field = self.peek()
+        if kind not in ('word', 'string'):
+            raise FilterError(f"Expected a field name in filter expression: {self.expr}")
+        self.pos += 1
+        field = _unquote(field) if kind == 'string' else field
+
+        kind, op = self.peek()
+        if kind == 'op' and op in _COMPARISONS:
+            self.pos += 1
+            return Compare(field, _COMPARISONS[op], self.parse_literal())
+        text_op = self.keyword(*_TEXT_OPS)
+        if text_op:
+            return Compare(field, text_op, self.parse_literal(as_text=True))
+        if self.keyword('in'):
+            self.expect('(')
+            values = [self.parse_literal()]
+            while self.peek() == ('op', ','):
+                self.pos += 1
+                values.append(self.parse_literal())
+            self.expect(')')
+            return Compare(field, 'in', tuple(values))
+        raise FilterError(f"Expected an operator after '{field}' in filter expression: {self.expr}")
+
+    def parse_literal(self, as_text: bool = False):
+        kind, text = self.peek()
+        if kind == 'string':
+            self.pos += 1
+            return _unquote(text)
+        # Bare words run until the next keyword or operator: "name contains John Smith"
+        words = []
+        while kind == 'word' and text.lower() not in _KEYWORDS:
+            words.append(text)
+            self.pos += 1
+            kind, text = self.peek()
+        if not words:
+            raise FilterError(f"Expected a value in filter expression: {self.expr}")
+        value = ' '.join(words)
+        return value if as_text else transform_io.infer_value(value)
+
+def _unquote(text: str) -> str:
+    return re.sub(r'\\(.)', r'\1', text[1:-1])
+
+def parse(expr: str):
+    """Parse a filter expression into an AST of Compare, BoolOp and Not nodes."""
+    return _Parser(expr).parse()
+
+def fields(node) -> List[str]:
+    """Field names referenced by an expression, in order of first use."""
+    if isinstance(node, Compare):
+        return [node.field]
+    names = []
+    for child in (node.operands if isinstance(node, BoolOp) else (node.operand,)):
+        names.extend(name for name in fields(child) if name not in names)
+    return names
+
+def infer_types(records: Iterable[Dict]) -> Dict[str, str]:
+    """Map each field to int, float, bool, str or mixed from a sample of records."""
+    types = {}
+    for record in records:
+        for key, value in record.items():
+            if value is None:
+                types.setdefault(key, None)
+                continue
+            kind = 'bool' if isinstance(value, bool) else 'int' if isinstance(value, int) else \
+                'float' if isinstance(value, float) else 'str'
+            current = types.get(key)
+            if current is None or current == kind:
+                types[key] = kind
+            elif current in _NUMERIC and kind in _NUMERIC:
+                types[key] = 'float'
+            else:
+                types[key] = 'mixed'
+    return types
+
+def frame_types(df) -> Dict[str, str]:
+    """Field types for a pandas DataFrame batch, in infer_types' vocabulary."""
+    import pandas as pd
+
+    types = {}
+    for name, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            types[name] = 'bool'
+        elif pd.api.types.is_integer_dtype(dtype):
+            types[name] = 'int'
+        elif pd.api.types.is_float_dtype(dtype):
+            types[name] = 'float' if df[name].notna().any() else None
+        else:
+            types[name] = infer_types({name: value} for value in df[name].dropna().head(TYPE_SAMPLE)).get(name)
+    return types
+
+def check(node, types: Dict[str, str]):
+    """Validate an expression against inferred field types and coerce literals to match.
+
+    Returns the expression with literals converted (e.g. '25' to 25 for an
+    int field). With no types (empty sample) the expression is returned as is.
+    """
+    if isinstance(node, BoolOp):
+        return BoolOp(node.op, tuple(check(child, types) for child in node.operands))
+    if isinstance(node, Not):
+        return Not(check(node.operand, types))
+    if not types:
+        return node
+    if node.field not in types:
+        raise FilterError(f"Unknown field '{node.field}' in filter (available: {', '.join(types)})")
+
+    field_type = types[node.field]
+    if node.op in _TEXT_OPS:
+        return node._replace(value=str(node.value))
+    values = node.value if node.op == 'in' else (node.value,)
+    coerced = tuple(_coerce(node, field_type, value) for value in values)
+    return node._replace(value=coerced if node.op == 'in' else coerced[0])
+
+def _coerce(node: Compare, field_type: Optional[str], value):
+    if field_type in _NUMERIC:
+        if isinstance(value, str):
+            value = transform_io.infer_value(value)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise FilterError(f"Field '{node.field}' is numeric but is compared with {value!r}")
+    elif field_type == 'str':
+        if node.op not in ('==', '!=', 'in') and isinstance(value, (int, float)):
+            raise FilterError(f"Field '{node.field}' is text but is ordered against number {value!r}; "
+                              f"quote the value to compare as text")
+        if value is not None and not isinstance(value, str):
+            value = str(value)
+    elif field_type == 'bool' and node.op not in ('==', '!=', 'in'):
+        raise FilterError(f"Field '{node.field}' is boolean and only supports = and !=")
+    return value
+
+class _Codegen:
+    def __init__(self, access: Callable[[str], str]):
+        self.access = access
+        self.constants = {}
+        self.temps = 0
+
+    def constant(self, value) -> str:
+        name = f"_c{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def emit(self, node) -> str:
+        if isinstance(node, BoolOp):
+            return '(' + f' {node.op} '.join(self.emit(child) for child in node.operands) + ')'
+        if isinstance(node, Not):
+            return f"(not {self.emit(node.operand)})"
+
+        temp = f"_v{self.temps}"
+        self.temps += 1
+        bound = f"({temp} := {self.access(node.field)}) is not None"
+        if node.value is None and node.op in ('==', '!='):
+            return f"({temp} := {self.access(node.field)}) {'is' if node.op == '==' else 'is not'} None"
+        if node.op == 'in':
+            return f"({bound} and {temp} in {self.constant(frozenset(node.value))})"
+        if node.op == 'contains':
+            return f"({bound} and {self.constant(node.value)} in str({temp}))"
+        if node.op in ('startswith', 'endswith'):
+            return f"({bound} and str({temp}).{node.op}({self.constant(node.value)}))"
+        if node.op not in ('==', '!=') and isinstance(node.value, (int, float, str)):
+            # Ordering against a value of another type is false for this comparison only,
+            # as in mask(), rather than raising and failing the whole row
+            kinds = '_str' if isinstance(node.value, str) else '_number'
+            return f"({bound} and isinstance({temp}, {kinds}) and {temp} {node.op} {self.constant(node.value)})"
+        return f"({bound} and {temp} {node.op} {self.constant(node.value)})"
+
+def compile_predicate(node, columns: Optional[Sequence[str]] = None,
+                      convert: Optional[Callable] = None) -> Callable:
+    """Fuse an expression into one Python function.
+
+    By default the function takes a record dict. With columns, it takes a raw
+    row list in that column order and applies convert to referenced cells
+    only, so rows can be rejected before a dict is built.
+    """
+    if columns is None:
+        access = lambda field: f"r.get({field!r})"
+    else:
+        index = {name: i for i, name in enumerate(columns)}
+        missing = [field for field in fields(node) if field not in index]
+        if missing:
+            raise FilterError(f"Unknown field '{missing[0]}' in filter (available: {', '.join(columns)})")
+        access = lambda field: f"_convert(r[{index[field]}])"
+
+    codegen = _Codegen(access)
+    body = codegen.emit(node)
+    source = (
+        "def _predicate(r):\n"
+        "    try:\n"
+        f"        return bool({body})\n"
+        "    except (TypeError, IndexError):\n"
+        "        return False\n"
+    )
+    namespace = dict(codegen.constants, _convert=convert or (lambda value: value), _str=str, _number=(int, float))
+    exec(compile(source, '<filter>', 'exec'), namespace)
+    return namespace['_predicate']
+
+def mask(node, df):
+    """Evaluate an expression over a pandas DataFrame batch as a boolean Series."""
+    import pandas as pd
+
+    if isinstance(node, BoolOp):
+        result = mask(node.operands[0], df)
+        for child in node.operands[1:]:
+            result = (result & mask(child, df)) if node.op == 'and' else (result | mask(child, df))
+        return result
+    if isinstance(node, Not):
+        return ~mask(node.operand, df)
+
+    column = df[node.field]
+    present = column.notna()
+    if node.value is None and node.op in ('==', '!='):
+        return ~present if node.op == '==' else present
+    if node.op == 'in':
+        return column.isin(list(node.value)) & present
+    if node.op in _TEXT_OPS:
+        text = column.astype(str).str
+        matched = (text.contains(node.value, regex=False) if node.op == 'contains'
+                   else getattr(text, node.op)(node.value))
+        return matched.fillna(False).astype(bool) & present
+    if node.op in ('==', '!='):
+        # Element-wise equality never raises, even on mixed object columns
+        return (column == node.value if node.op == '==' else column != node.value).astype(bool) & present
+    if isinstance(node.value, (int, float)) and not isinstance(node.value, bool) \
+            and not pd.api.types.is_numeric_dtype(column):
+        # Only numbers order against a number; text such as '5' or 'x' is not coerced
+        numbers = column.map(type).isin((int, float, bool))
+        column = pd.to_numeric(column.where(numbers), errors='coerce')
+        present = column.notna()
+    ops = {'==': column.__eq__, '!=': column.__ne__, '>': column.__gt__, '>=': column.__ge__,
+           '<': column.__lt__, '<=': column.__le__}
+    try:
+        return ops[node.op](node.value).fillna(False).astype(bool) & present
+    except TypeError:
+        # Mixed-type object column: fall back to the row predicate for this comparison
+        single = compile_predicate(node._replace(field='value'))
+        return column.map(lambda value: single({'value': value})).astype(bool)
+
+def to_sql(node, quote: Callable[[str], str] = lambda name: '"' + name.replace('"', '""') + '"') -> Tuple[str, List]:
+    """Translate an expression into a parameterized SQL WHERE clause."""
+    if isinstance(node, BoolOp):
+        parts, params = [], []
+        for child in node.operands:
+            clause, child_params = to_sql(child, quote)
+            parts.append(clause)
+            params.extend(child_params)
+        return '(' + f' {node.op.upper()} '.join(parts) + ')', params
+    if isinstance(node, Not):
+        clause, params = to_sql(node.operand, quote)
+        # A comparison on NULL is unknown in SQL but false in the predicate and mask;
+        # settle it before negating so "not (v > 6)" keeps rows where v is NULL
+        return f"(NOT COALESCE({clause}, 0))", params
+
+    column = quote(node.field)
+    if node.value is None and node.op in ('==', '!='):
+        return f"{column} IS {'NULL' if node.op == '==' else 'NOT NULL'}", []
+    if node.op == 'in':
+        return f"{column} IN ({', '.join('?' for _ in node.value)})", list(node.value)
+    if node.op in _TEXT_OPS:
+        # instr()/substr() stay case-sensitive like the Python predicate; SQLite's LIKE is not
+        text = f"CAST({column} AS TEXT)"
+        if node.op == 'contains':
+            return f"instr({text}, ?) > 0", [node.value]
+        if node.op == 'startswith':
+            return f"substr({text}, 1, ?) = ?", [len(node.value), node.value]
+        return f"substr({text}, -?) = ?", [len(node.value), node.value]
+    return f"{column} {'=' if node.op == '==' else node.op} ?", [node.value]
+
+class Filter:
+    """A parsed filter expression, compiled per input once its field types are known."""
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.tree = parse(expr)
+        self.fields = fields(self.tree)
+
+    def typed(self, types: Dict[str, str]):
+        return check(self.tree, types)
+
+    def predicate(self, sample: Iterable[Dict]) -> Callable[[Dict], bool]:
+        """Compile a record predicate typed against sample records."""
+        return compile_predicate(self.typed(infer_types(islice(sample, TYPE_SAMPLE))))
+
+    def row_predicate(self, columns: Sequence[str], sample_rows: Iterable[Sequence], convert: Callable) -> Callable:
+        """Compile a predicate over raw rows in columns order, typed against sample rows."""
+        sample = ({name: convert(value) for name, value in zip(columns, row)}
+                  for row in islice(sample_rows, TYPE_SAMPLE))
+        return compile_predicate(self.typed(infer_types(sample)), columns, convert)
+
+    def masker(self, sample_df) -> Callable:
+        """Return a function computing the boolean mask for DataFrame batches shaped like sample_df."""
+        tree = self.typed(frame_types(sample_df))
+        return lambda df: mask(tree, df)
+
+    def to_sql(self, quote=None, types: Optional[Dict[str, str]] = None) -> Tuple[str, List]:
+        """WHERE clause and parameters; with column types, the expression is checked and coerced first."""
+        tree = self.typed(types) if types else self.tree
+        return to_sql(tree, quote) if quote else to_sql(tree)
@@ -0,0 +1,497 @@
+import csv
+import json
+import re
+import xml.etree.ElementTree as ET
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+FORMATS = {
+    '.json': 'json',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.csv': 'csv',
+    '.yaml': 'yaml',
+    '.yml': 'yaml',
+    '.xml': 'xml',
+    '.txt': 'txt',
+    '.db': 'sqlite',
+    '.sqlite': 'sqlite',
+    '.sqlite3': 'sqlite',
+    '.sql': 'sql',
+    '.xlsx': 'excel',
+}
+
+# Records per chunk when pulling rows from line-oriented readers
+CHUNK_SIZE = 10000
+# Bytes per read when scanning JSON input
+JSON_READ_SIZE = 1 << 16
+# Largest single JSON record the reader will buffer, in characters
+JSON_MAX_RECORD = 1 << 26
+
+_INT_RE = re.compile(r'^[+-]?\d+$')
+_FLOAT_RE = re.compile(r'^[+-]?(\d+\.\d*|\.\d+|\d+)([eE][+-]?\d+)?$')
+_TAG_RE = re.compile(r'[^A-Za-z0-9_.-]')
+# What may follow a JSON decode error position when the input was merely cut short
+_JSON_TAIL_RE = re.compile(r'[\w.+-]*')
+
+def detect_format(path: str, override: Optional[str] = None) -> str:
+    if override:
+        if override.lower() not in FORMATS.values():
+            raise ValueError(f"Unsupported format: {override}")
+        return override.lower()
+    suffix = Path(path).suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported format: {suffix or path}")
+    return FORMATS[suffix]
+
+def infer_value(text: Optional[str]):
+    """Convert a text field to int, float, bool or None where it unambiguously is one."""
+    if text is None or text == '':
+        return None
+    if _INT_RE.match(text):
+        return int(text)
+    if _FLOAT_RE.match(text):
+        return float(text)
+    lowered = text.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    if lowered in ('null', 'none'):
+        return None
+    return text
+
+def chunked(iterable: Iterable, size: int = CHUNK_SIZE) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+# Readers: each yields one dict per record and holds at most a chunk in memory
+
+def read_json(path: str, **options) -> Iterator[Dict]:
+    """Stream records from a JSON array, JSON Lines, or concatenated JSON documents.
+
+    Only the current record and one read buffer are held in memory, so
+    arrays larger than RAM can be converted.
+    """
+    decoder = json.JSONDecoder()
+    read_size = JSON_READ_SIZE
+    # Offset in the file of buffer[0], for error messages
+    base = 0
+    with open(path, encoding='utf-8') as f:
+        buffer = f.read(read_size)
+        eof = not buffer
+        pos = _skip_whitespace(buffer, 0)
+        in_array = pos < len(buffer) and buffer[pos] == '['
+        if in_array:
+            pos += 1
+
+        while True:
+            pos = _skip_whitespace(buffer, pos)
+            if in_array and pos < len(buffer) and buffer[pos] in ',]':
+                if buffer[pos] == ']':
+                    return
+                pos += 1
+                continue
+            if pos >= len(buffer):
+                if eof:
+                    if in_array:
+                        raise ValueError(f"Unterminated JSON array in {path}")
+                    return
+                base += pos
+                buffer, pos, eof = _refill(f, buffer, pos, read_size)
+                continue
+
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof or not _json_truncated(buffer, e):
+                    raise ValueError(f"Invalid JSON in {path} at char {base + e.pos}: {e.msg}") from None
+                if len(buffer) - pos >= JSON_MAX_RECORD:
+                    raise ValueError(f"JSON record at char {base + pos} in {path} "
+                                     f"is larger than {JSON_MAX_RECORD} characters") from None
+                # Record spans the buffer boundary: read more and retry
+                base += pos
+                buffer, pos, eof = _refill(f, buffer, pos, read_size)
+                read_size = min(read_size * 2, JSON_MAX_RECORD)
+                continue
+            if end == len(buffer) and not eof:
+                # A number at the very end may be cut short; decode again with more input
+                base += pos
+                buffer, pos, eof = _refill(f, buffer, pos, read_size)
+                continue
+
+            read_size = JSON_READ_SIZE
+            pos = end
+            if isinstance(value, list) and not in_array:
+                yield from value
+            else:
+                yield value
+
+def _json_truncated(buffer: str, error: json.JSONDecodeError) -> bool:
+    """True if a decode error can be cured by reading more input, i.e. the buffer ended mid-record.
+
+    Such errors sit inside a string that runs to the end of the buffer, or are
+    followed only by the start of a literal or number.
+    """
+    return error.msg.startswith('Unterminated string') or _JSON_TAIL_RE.fullmatch(buffer, error.pos) is not None
+
+def _skip_whitespace(buffer: str, pos: int) -> int:
+    while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+        pos += 1
+    return pos
+
+def _refill(f, buffer: str, pos: int, read_size: int):
+    more = f.read(read_size)
+    return buffer[pos:] + more, 0, not more
+
+def read_csv(path: str, delimiter: str = ',', infer: bool = True, where=None, columns: Optional[List[str]] = None,
+             stats=None, **options) -> Iterator[Dict]:
+    """Stream CSV rows in chunks, applying a pushed-down filter and column projection.
+
+    With pandas installed, chunks are parsed column-wise and filtered with a
+    vectorized mask over the converted filter fields. Otherwise the filter
+    runs on raw rows. Either way rejected rows are never converted to dicts,
+    and values match an unfiltered read. stats.records_in counts rows scanned.
+    """
+    if where is not None or columns:
+        try:
+            import pandas
+        except ImportError:
+            pandas = None
+        if pandas is not None:
+            yield from _read_csv_frames(path, delimiter, infer, where, columns, stats)
+            return
+
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        convert = infer_value if infer else (lambda value: value)
+        names = columns or header
+        missing = [name for name in names if name not in header]
+        if missing:
+            raise ValueError(f"Column '{missing[0]}' not found in {path}")
+        indexes = [header.index(name) for name in names]
+        predicate = None
+        for rows in chunked(reader):
+            if stats is not None:
+                stats.records_in += len(rows)
+            if where is not None:
+                if predicate is None:
+                    predicate = where.row_predicate(header, rows, convert)
+                rows = filter(predicate, rows)
+            for row in rows:
+                yield {name: convert(row[i]) if i < len(row) else None for name, i in zip(names, indexes)}
+
+def _read_csv_frames(path: str, delimiter: str, infer: bool, where, columns: Optional[List[str]], stats) -> Iterator[Dict]:
+    import pandas as pd
+
+    # Cells stay text and go through infer_value like the csv-module path, so
+    # pushdown never changes values (pandas would make '' NaN, 'NA' null, 30 30.0)
+    convert = infer_value if infer else (lambda value: value)
+    usecols = None
+    if columns:
+        usecols = columns + [name for name in (where.fields if where is not None else []) if name not in columns]
+    mask = None
+    for chunk in pd.read_csv(path, sep=delimiter, chunksize=CHUNK_SIZE, usecols=usecols,
+                             dtype=str, keep_default_na=False):
+        if stats is not None:
+            stats.records_in += len(chunk)
+        # Short rows leave NaN in the missing cells; the csv path yields None for them
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        if where is not None:
+            if mask is None:
+                missing = [name for name in where.fields if name not in chunk.columns]
+                if missing:
+                    raise ValueError(f"Unknown field '{missing[0]}' in filter (available: {', '.join(chunk.columns)})")
+            # Only the filtered fields are converted before the mask rejects rows
+            typed = pd.DataFrame({name: chunk[name].map(convert) for name in where.fields})
+            if mask is None:
+                mask = where.masker(typed)
+            chunk = chunk[mask(typed).to_numpy()]
+        names = columns or list(chunk.columns)
+        for row in chunk[names].itertuples(index=False, name=None):
+            yield {name: convert(value) for name, value in zip(names, row)}
+
+def read_xml(path: str, record_tag: Optional[str] = None, infer: bool = True, **options) -> Iterator[Dict]:
+    """Stream records with iterparse, clearing each element once it is converted.
+
+    Records are the direct children of the root element, or every element
+    named record_tag when given. Converted records are detached from their
+    parent, so memory stays flat however deep the record tag is nested.
+    """
+    convert = infer_value if infer else (lambda value: value)
+    # Open elements; an element is its parent's last child until its end event
+    stack = []
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if (record_tag and elem.tag == record_tag) or (not record_tag and len(stack) == 1):
+            yield _element_to_dict(elem, convert)
+            elem.clear()
+            if stack:
+                del stack[-1][-1]
+
+def _element_to_dict(elem, convert) -> Dict:
+    record = {key: convert(value) for key, value in elem.attrib.items()}
+    for child in elem:
+        value = _element_to_dict(child, convert) if len(child) or child.attrib else convert((child.text or '').strip())
+        if child.tag in record:
+            if not isinstance(record[child.tag], list):
+                record[child.tag] = [record[child.tag]]
+            record[child.tag].append(value)
+        else:
+            record[child.tag] = value
+    if not len(elem) and not elem.attrib:
+        return {'value': convert((elem.text or '').strip())}
+    return record
+
+def read_yaml(path: str, **options) -> Iterator[Dict]:
+    """Stream YAML documents; a document that is a list yields its items.
+
+    PyYAML builds each document whole, so memory is bounded by the largest
+    document rather than the file. Use multi-document streams for big inputs.
+    """
+    import yaml
+    with open(path, encoding='utf-8') as f:
+        for document in yaml.safe_load_all(f):
+            if isinstance(document, list):
+                yield from document
+            elif document is not None:
+                yield document
+
+def read_txt(path: str, pattern: Optional[str] = None, infer: bool = True, **options) -> Iterator[Dict]:
+    """One record per line; with a pattern, named groups become fields and non-matching lines are skipped."""
+    regex = re.compile(pattern) if pattern else None
+    convert = infer_value if infer else (lambda value: value)
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if regex is None:
+                yield {'line': line}
+                continue
+            match = regex.search(line)
+            if match:
+                yield {key: convert(value) for key, value in match.groupdict().items()}
+
+def read_sqlite(path: str, **options) -> Iterator[Dict]:
+    import transform_sql
+    return transform_sql.read_sqlite(path, **options)
+
+def read_sql_dump(path: str, **options) -> Iterator[Dict]:
+    import transform_sql
+    return transform_sql.read_sql_dump(path, **options)
+
+def read_excel(path: str, **options) -> Iterator[Dict]:
+    import transform_excel
+    return transform_excel.read_excel(path, **options)
+
+# Readers that accept where=, columns= and stats= and filter before building records
+PUSHDOWN_FORMATS = {'csv', 'sqlite', 'sql'}
+
+# Line-oriented formats that can be split into byte ranges for parallel readers
+SHARDABLE_FORMATS = {'csv', 'jsonl', 'txt'}
+
+def shard_ranges(path: str, input_format: str, shards: int) -> List[tuple]:
+    """Split a file into up to `shards` byte ranges; a range owns the lines that start inside it.
+
+    CSV shards assume no quoted field contains a newline.
+    """
+    if input_format not in SHARDABLE_FORMATS:
+        raise ValueError(f"Parallel reading needs a line-oriented format ({', '.join(sorted(SHARDABLE_FORMATS))})")
+    size = Path(path).stat().st_size
+    start = 0
+    if input_format == 'csv':
+        with open(path, 'rb') as f:
+            start = len(f.readline())
+    step = max(1, (size - start + shards - 1) // shards)
+    return [(offset, min(offset + step, size)) for offset in range(start, size, step)] or [(start, size)]
+
+def _shard_lines(path: str, start: int, end: int) -> Iterator[str]:
+    with open(path, 'rb') as f:
+        if start:
+            # Skip the line that started before this shard; the previous shard owns it
+            f.seek(start - 1)
+            position = start - 1 + len(f.readline())
+        else:
+            position = 0
+        while position < end:
+            line = f.readline()
+            if not line:
+                return
+            position += len(line)
+            yield line.decode('utf-8')
+
+def read_shard(path: str, input_format: str, start: int, end: int, delimiter: str = ',', infer: bool = True,
+               pattern: Optional[str] = None, **options) -> Iterator[Dict]:
+    """Read the records whose lines start in [start, end) of a line-oriented file."""
+    lines = _shard_lines(path, start, end)
+    convert = infer_value if infer else (lambda value: value)
+    if input_format == 'jsonl':
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    elif input_format == 'csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            header = next(csv.reader(f, delimiter=delimiter))
+        for row in csv.reader(lines, delimiter=delimiter):
+            yield {name: convert(value) for name, value in zip(header, row)}
+    else:
+        regex = re.compile(pattern) if pattern else None
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if regex is None:
+                yield {'line': line}
+                continue
+            match = regex.search(line)
+            if match:
+                yield {key: convert(value) for key, value in match.groupdict().items()}
+
+READERS = {
+    'json': read_json,
+    'jsonl': read_json,
+    'csv': read_csv,
+    'xml': read_xml,
+    'yaml': read_yaml,
+    'txt': read_txt,
+    'sqlite': read_sqlite,
+    'sql': read_sql_dump,
+    'excel': read_excel,
+}
+
+# Writers: each consumes the record iterator lazily and returns the number written
+
+def _json_default(value):
+    return str(value)
+
+def write_json(records: Iterable[Dict], path: str, **options) -> int:
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for record in records:
+            f.write(',\n  ' if count else '\n  ')
+            f.write(json.dumps(record, default=_json_default))
+            count += 1
+        f.write('\n]\n' if count else ']\n')
+    return count
+
+def write_jsonl(records: Iterable[Dict], path: str, **options) -> int:
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, default=_json_default))
+            f.write('\n')
+            count += 1
+    return count
+
+def write_csv(records: Iterable[Dict], path: str, delimiter: str = ',', fields: Optional[List[str]] = None,
+              **options) -> int:
+    """Write CSV with a header from fields, or from the first record's keys.
+
+    Keys that first appear after the first record are dropped; pass
+    --select to fix the column set for heterogeneous inputs.
+    """
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = None
+        for record in records:
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=fields or list(record), delimiter=delimiter,
+                                        extrasaction='ignore')
+                writer.writeheader()
+            writer.writerow({key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                             for key, value in record.items()})
+            count += 1
+    return count
+
+def write_xml(records: Iterable[Dict], path: str, root_tag: str = 'records', record_tag: Optional[str] = None,
+              **options) -> int:
+    record_tag = record_tag or 'record'
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<?xml version="1.0" encoding="utf-8"?>\n<{root_tag}>\n')
+        for record in records:
+            f.write(f'  <{record_tag}>{_xml_fields(record)}</{record_tag}>\n')
+            count += 1
+        f.write(f'</{root_tag}>\n')
+    return count
+
+def _xml_fields(record: Dict) -> str:
+    parts = []
+    for key, value in record.items():
+        tag = _TAG_RE.sub('_', str(key))
+        if not tag or not (tag[0].isalpha() or tag[0] == '_'):
+            tag = f'_{tag}'
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, dict):
+                parts.append(f'<{tag}>{_xml_fields(item)}</{tag}>')
+            elif item is None:
+                parts.append(f'<{tag}/>')
+            else:
+                parts.append(f'<{tag}>{escape(str(item))}</{tag}>')
+    return ''.join(parts)
+
+def write_yaml(records: Iterable[Dict], path: str, **options) -> int:
+    import yaml
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            # Dumping one-item lists streams a single top-level sequence
+            f.write(yaml.safe_dump([record], sort_keys=False, default_flow_style=False, allow_unicode=True))
+            count += 1
+        if not count:
+            f.write('[]\n')
+    return count
+
+def _text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return str(value)
+
+def write_txt(records: Iterable[Dict], path: str, **options) -> int:
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            if list(record) == ['line']:
+                f.write(f"{record['line']}\n")
+            else:
+                f.write('\t'.join(_text(value) for value in record.values()))
+                f.write('\n')
+            count += 1
+    return count
+
+def write_sqlite(records: Iterable[Dict], path: str, **options) -> int:
+    import transform_sql
+    return transform_sql.write_sqlite(records, path, **options)
+
+def write_sql_dump(records: Iterable[Dict], path: str, **options) -> int:
+    import transform_sql
+    return transform_sql.write_sql_dump(records, path, **options)
+
+def write_excel(records: Iterable[Dict], path: str, **options) -> int:
+    import transform_excel
+    return transform_excel.write_excel(records, path, **options)
+
+WRITERS = {
+    'json': write_json,
+    'jsonl': write_jsonl,
+    'csv': write_csv,
+    'xml': write_xml,
+    'yaml': write_yaml,
+    'txt': write_txt,
+    'sqlite': write_sqlite,
+    'sql': write_sql_dump,
+    'excel': write_excel,
+}
+
+# Writers that add to an existing file and roll back on failure themselves
+TRANSACTIONAL_FORMATS = {'sqlite'}
@@ -0,0 +1,110 @@
+import time
+from itertools import chain, islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import transform_agg
+import transform_filter
+import transform_io
+
+class PipelineStats:
+    def __init__(self):
+        self.records_in = 0
+        self.records_out = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self) -> None:
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def throughput(self) -> float:
+        return self.records_in / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (f"Transformed {self.records_out} of {self.records_in} records in {self.elapsed:.2f}s "
+                f"({self.throughput:,.0f} records/s)")
+
+# Stages: each wraps the upstream iterator and stays lazy
+
+def count_stage(records: Iterable[Dict], stats: PipelineStats, attribute: str) -> Iterator[Dict]:
+    count = 0
+    try:
+        for record in records:
+            count += 1
+            yield record
+    finally:
+        setattr(stats, attribute, getattr(stats, attribute) + count)
+
+def filter_stage(records: Iterable[Dict], where: transform_filter.Filter) -> Iterator[Dict]:
+    """Compile the filter against the first records' types, then apply it to the whole stream."""
+    records = iter(records)
+    sample = list(islice(records, transform_filter.TYPE_SAMPLE))
+    yield from filter(where.predicate(sample), chain(sample, records))
+
+def select_stage(records: Iterable[Dict], fields: List[str]) -> Iterator[Dict]:
+    for record in records:
+        yield {field: record.get(field) for field in fields}
+
+def open_records(input_path: str, input_format: str, stats: PipelineStats,
+                 where: Optional[transform_filter.Filter] = None, fields: Optional[List[str]] = None,
+                 reader_options: Optional[Dict] = None) -> Iterator[Dict]:
+    """Open a filtered record stream, pushing the filter into the reader when it supports it.
+
+    fields lists every field needed downstream; pushdown readers skip the rest.
+    """
+    reader_options = dict(reader_options or {})
+    if input_format in transform_io.PUSHDOWN_FORMATS:
+        reader_options.update(where=where, stats=stats)
+        if fields:
+            reader_options['columns'] = fields + [field for field in (where.fields if where else [])
+                                                  if field not in fields]
+        return transform_io.READERS[input_format](input_path, **reader_options)
+
+    records = count_stage(transform_io.READERS[input_format](input_path, **reader_options), stats, 'records_in')
+    return filter_stage(records, where) if where else records
+
+def aggregate_stage(input_path: str, input_format: str, stats: PipelineStats, group_by: List[str],
+                    aggregates: List, where: Optional[transform_filter.Filter] = None,
+                    reader_options: Optional[Dict] = None, memory_bytes: Optional[int] = None,
+                    workers: int = 1) -> Iterator[Dict]:
+    memory_bytes = memory_bytes or transform_agg.DEFAULT_MEMORY_MB * 1024 * 1024
+    if workers > 1:
+        return transform_agg.aggregate_parallel(input_path, input_format, group_by, aggregates, workers,
+                                                memory_bytes, where, reader_options, stats)
+    needed = group_by + [field for _, field in aggregates if field and field not in group_by]
+    records = open_records(input_path, input_format, stats, where, needed, reader_options)
+    return transform_agg.HashAggregator(group_by, aggregates, memory_bytes).consume(records).results()
+
+def run(input_path: str, output_path: str, input_format: str, output_format: str,
+        where: Optional[transform_filter.Filter] = None, fields: Optional[List[str]] = None,
+        reader_options: Optional[Dict] = None, writer_options: Optional[Dict] = None,
+        group_by: Optional[List[str]] = None, aggregates: Optional[List] = None,
+        memory_bytes: Optional[int] = None, workers: int = 1,
+        tap: Optional[Callable[[Iterator[Dict]], Iterator[Dict]]] = None) -> PipelineStats:
+    """Stream input_path through filter, optional aggregation and select into output_path.
+
+    tap, if given, wraps the final record stream just before the writer.
+    """
+    stats = PipelineStats()
+    if group_by or aggregates:
+        records = aggregate_stage(input_path, input_format, stats, group_by or [], aggregates or [('count', None)],
+                                  where, reader_options, memory_bytes, workers)
+    else:
+        records = open_records(input_path, input_format, stats, where, fields, reader_options)
+    if fields:
+        records = select_stage(records, fields)
+    if tap:
+        records = tap(records)
+    writer_options = dict(writer_options or {})
+    if fields:
+        writer_options.setdefault('fields', fields)
+    try:
+        stats.records_out = transform_io.WRITERS[output_format](records, output_path, **writer_options)
+    except BaseException:
+        # Don't leave a truncated output behind
+        if output_format not in transform_io.TRANSACTIONAL_FORMATS:
+            Path(output_path).unlink(missing_ok=True)
+        raise
+    stats.finish()
+    return stats
@@ -0,0 +1,265 @@
+import json
+import os
+import re
+import sqlite3
+import tempfile
+from itertools import chain, islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import transform_io
+
+# Rows per multi-row INSERT statement in .sql dumps
+DUMP_ROWS_PER_INSERT = 500
+# Page cache for bulk loads, in KiB (negative values are KiB in SQLite)
+LOAD_CACHE_KIB = 64 * 1024
+
+_DIRECT_TYPES = (int, float, str, bytes, type(None))
+_DUMP_CONTROL_RE = re.compile(r'^\s*(BEGIN|COMMIT|END)\b', re.IGNORECASE)
+_IDENTIFIER_RE = re.compile(r'[^A-Za-z0-9_]')
+
+def quote_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+def table_name(path: str) -> str:
+    """Default table name: the file stem with non-identifier characters replaced."""
+    name = _IDENTIFIER_RE.sub('_', Path(path).stem) or 'records'
+    return f'_{name}' if name[0].isdigit() else name
+
+def column_types(records: Iterable[Dict], fields: List[str]) -> Dict[str, str]:
+    """SQLite column types for fields, from the values in a sample of records."""
+    kinds = {field: set() for field in fields}
+    for record in records:
+        for field in fields:
+            value = record.get(field)
+            if value is not None:
+                kinds[field].add(type(value))
+    types = {}
+    for field, seen in kinds.items():
+        if seen and seen <= {int, bool}:
+            types[field] = 'INTEGER'
+        elif seen and seen <= {int, bool, float}:
+            types[field] = 'REAL'
+        elif seen and seen <= {bytes}:
+            types[field] = 'BLOB'
+        else:
+            types[field] = 'TEXT'
+    return types
+
+def _filter_types(schema: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """Map declared column types to the filter's type names using SQLite's affinity rules."""
+    types = {}
+    for name, declared in schema.items():
+        declared = declared.upper()
+        if 'INT' in declared:
+            types[name] = 'int'
+        elif any(word in declared for word in ('CHAR', 'CLOB', 'TEXT')):
+            types[name] = 'str'
+        elif any(word in declared for word in ('REAL', 'FLOA', 'DOUB')):
+            types[name] = 'float'
+        else:
+            types[name] = None
+    return types
+
+def _adapt(value):
+    if isinstance(value, _DIRECT_TYPES):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+def _fields(sample: List[Dict], fields: Optional[List[str]]) -> List[str]:
+    if fields:
+        return fields
+    names = {}
+    for record in sample:
+        names.update(dict.fromkeys(record))
+    return list(names)
+
+def _create_table(table: str, types: Dict[str, str]) -> str:
+    columns = ', '.join(f'{quote_identifier(name)} {kind}' for name, kind in types.items())
+    return f'CREATE TABLE {quote_identifier(table)} ({columns})'
+
+def _create_indexes(table: str, indexes: Optional[List[str]]) -> List[str]:
+    statements = []
+    for spec in indexes or []:
+        columns = [column.strip() for column in spec.split(',') if column.strip()]
+        name = table_name(f"idx_{table}_{'_'.join(columns)}")
+        statements.append(f"CREATE INDEX IF NOT EXISTS {quote_identifier(name)} ON {quote_identifier(table)} "
+                          f"({', '.join(quote_identifier(column) for column in columns)})")
+    return statements
+
+def table_columns(conn: sqlite3.Connection, table: str) -> Dict[str, str]:
+    """Column names and declared types of a table, in order."""
+    rows = conn.execute(f'PRAGMA table_info({quote_identifier(table)})').fetchall()
+    return {row[1]: row[2] for row in rows}
+
+def _default_table(conn: sqlite3.Connection, path: str) -> str:
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    if len(tables) != 1:
+        raise ValueError(f"{path} has {len(tables)} tables; choose one with --table "
+                         f"({', '.join(tables) or 'none found'})")
+    return tables[0]
+
+def read_sqlite(path: str, table: Optional[str] = None, where=None, columns: Optional[List[str]] = None,
+                stats=None, **options) -> Iterator[Dict]:
+    """Stream a table through a cursor with fetchmany.
+
+    A pushed-down filter becomes a parameterized WHERE clause, type-checked
+    against the declared column types, so SQLite skips non-matching rows.
+    stats.records_in counts the rows SQLite returns.
+    """
+    if not Path(path).is_file():
+        raise FileNotFoundError(f"No such database: {path}")
+    conn = sqlite3.connect(f'{Path(path).resolve().as_uri()}?mode=ro', uri=True)
+    try:
+        table = table or _default_table(conn, path)
+        schema = table_columns(conn, table)
+        if not schema:
+            raise ValueError(f"Table '{table}' not found in {path}")
+        missing = [name for name in columns or [] if name not in schema]
+        if missing:
+            raise ValueError(f"Column '{missing[0]}' not found in table '{table}'")
+
+        selected = ', '.join(quote_identifier(name) for name in columns) if columns else '*'
+        query, params = f'SELECT {selected} FROM {quote_identifier(table)}', []
+        if where is not None:
+            clause, params = where.to_sql(quote_identifier, _filter_types(schema))
+            query += f' WHERE {clause}'
+        try:
+            cursor = conn.execute(query, params)
+        except sqlite3.Error as e:
+            raise ValueError(f"{path}: {e}") from e
+        names = [description[0] for description in cursor.description]
+        while True:
+            rows = cursor.fetchmany(transform_io.CHUNK_SIZE)
+            if not rows:
+                return
+            if stats is not None:
+                stats.records_in += len(rows)
+            for row in rows:
+                yield dict(zip(names, row))
+    finally:
+        conn.close()
+
+def read_sql_dump(path: str, **options) -> Iterator[Dict]:
+    """Load a .sql dump into a temporary database in one transaction, then stream it like read_sqlite."""
+    fd, database = tempfile.mkstemp(suffix='.db', prefix='transform-sql-')
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(database, isolation_level=None)
+        try:
+            conn.execute('PRAGMA journal_mode = OFF')
+            conn.execute('PRAGMA synchronous = OFF')
+            conn.execute('BEGIN')
+            statement = []
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    statement.append(line)
+                    if not line.rstrip().endswith(';'):
+                        continue
+                    text = ''.join(statement)
+                    if sqlite3.complete_statement(text):
+                        # The dump's own transaction control would end ours early
+                        if not _DUMP_CONTROL_RE.match(text):
+                            conn.execute(text)
+                        statement = []
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            raise ValueError(f"{path}: {e}") from e
+        finally:
+            conn.close()
+        yield from read_sqlite(database, **options)
+    finally:
+        os.unlink(database)
+
+def write_sqlite(records: Iterable[Dict], path: str, table: Optional[str] = None, fields: Optional[List[str]] = None,
+                 index: Optional[List[str]] = None, if_exists: str = 'replace', **options) -> int:
+    """Bulk-load records into a SQLite table.
+
+    Column types come from the first CHUNK_SIZE records. Rows go in with
+    executemany, a chunk at a time, inside a single transaction; indexes are
+    built after the load. On failure the transaction is rolled back, leaving
+    an existing database untouched.
+    """
+    table = table or table_name(path)
+    records = iter(records)
+    sample = list(islice(records, transform_io.CHUNK_SIZE))
+    names = _fields(sample, fields)
+    if not names:
+        return 0
+    types = column_types(sample, names)
+
+    created = not Path(path).exists()
+    conn = sqlite3.connect(path, isolation_level=None)
+    loaded = False
+    try:
+        conn.execute(f'PRAGMA cache_size = -{LOAD_CACHE_KIB}')
+        conn.execute('BEGIN')
+        if table_columns(conn, table):
+            if if_exists == 'fail':
+                raise ValueError(f"Table '{table}' already exists in {path}")
+            if if_exists == 'replace':
+                conn.execute(f'DROP TABLE {quote_identifier(table)}')
+        if not table_columns(conn, table):
+            conn.execute(_create_table(table, types))
+
+        insert = (f"INSERT INTO {quote_identifier(table)} ({', '.join(quote_identifier(name) for name in names)}) "
+                  f"VALUES ({', '.join('?' for _ in names)})")
+        count = 0
+        for chunk in transform_io.chunked(chain(sample, records)):
+            conn.executemany(insert, [tuple(_adapt(record.get(name)) for name in names) for record in chunk])
+            count += len(chunk)
+        for statement in _create_indexes(table, index):
+            conn.execute(statement)
+        conn.execute('COMMIT')
+        loaded = True
+    except sqlite3.Error as e:
+        raise ValueError(f"{path}: {e}") from e
+    finally:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        conn.close()
+        if created and not loaded:
+            Path(path).unlink(missing_ok=True)
+    return count
+
+def sql_literal(value) -> str:
+    value = _adapt(value)
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        # SQLite has no literal for non-finite floats
+        return repr(value) if value == value and value not in (float('inf'), float('-inf')) else 'NULL'
+    if isinstance(value, bytes):
+        return f"X'{value.hex()}'"
+    return "'" + value.replace("'", "''") + "'"
+
+def write_sql_dump(records: Iterable[Dict], path: str, table: Optional[str] = None,
+                   fields: Optional[List[str]] = None, index: Optional[List[str]] = None, **options) -> int:
+    """Write a SQLite-compatible .sql script: one transaction of multi-row INSERTs, indexes last."""
+    table = table or table_name(path)
+    records = iter(records)
+    sample = list(islice(records, transform_io.CHUNK_SIZE))
+    names = _fields(sample, fields)
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('BEGIN TRANSACTION;\n')
+        if names:
+            f.write(f'DROP TABLE IF EXISTS {quote_identifier(table)};\n')
+            f.write(f'{_create_table(table, column_types(sample, names))};\n')
+            insert = (f"INSERT INTO {quote_identifier(table)} "
+                      f"({', '.join(quote_identifier(name) for name in names)}) VALUES\n")
+            for chunk in transform_io.chunked(chain(sample, records), DUMP_ROWS_PER_INSERT):
+                f.write(insert)
+                f.write(',\n'.join('(' + ', '.join(sql_literal(record.get(name)) for name in names) + ')'
+                                   for record in chunk))
+                f.write(';\n')
+                count += len(chunk)
+            for statement in _create_indexes(table, index):
+                f.write(f'{statement};\n')
+        f.write('COMMIT;\n')
+    return count
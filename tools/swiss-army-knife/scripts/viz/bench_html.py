@@ -0,0 +1,67 @@
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import viz_interactive
+
+def _directory_size(directory: Path) -> int:
+    return sum(path.stat().st_size for path in directory.rglob('*') if path.is_file())
+
+def run_benchmark(charts: int, points: int, workdir: Path) -> list:
+    """Write the same figures in full and lean modes and return size and time per mode."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'x': np.arange(points), 'y': rng.normal(size=points).cumsum(),
+                       'group': rng.choice(['a', 'b', 'c'], size=points)})
+    fig = viz_interactive.create_interactive_plot(df, 'scatter', 'x', 'y', 'group')
+
+    modes = {
+        'full': lambda out: fig.write_html(out),
+        'lean': lambda out: viz_interactive.write_lean_html(fig, out, workdir / 'lean' / 'assets'),
+        'lean+gzip': lambda out: viz_interactive.write_lean_html(fig, out, workdir / 'lean+gzip' / 'assets',
+                                                                 compress=True),
+    }
+    results = []
+    for mode, write in modes.items():
+        directory = workdir / mode
+        directory.mkdir(parents=True)
+        start = time.perf_counter()
+        for i in range(charts):
+            write(directory / f"chart_{i}.html")
+        elapsed = time.perf_counter() - start
+
+        size = _directory_size(directory)
+        if mode == 'lean+gzip':
+            # Count what a server with precompressed files would send: the .gz copies only
+            size = sum(path.stat().st_size for path in directory.rglob('*.gz'))
+        results.append({'mode': mode, 'bytes': size, 'seconds': elapsed})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare full and lean interactive HTML output')
+    parser.add_argument('--charts', type=int, default=50, help='Number of pages to write per mode')
+    parser.add_argument('--points', type=int, default=10000, help='Points per chart')
+    parser.add_argument('--keep', help='Keep the written files in this directory')
+    args = parser.parse_args()
+
+    workdir = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix='viz-bench-'))
+    try:
+        results = run_benchmark(args.charts, args.points, workdir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = results[0]
+    print(f"{args.charts} charts x {args.points} points")
+    print(f"{'mode':<10} {'total size':>12} {'vs full':>8} {'write time':>11} {'per chart':>10}")
+    for result in results:
+        print(f"{result['mode']:<10} {result['bytes'] / 1e6:>10.2f}MB "
+              f"{result['bytes'] / baseline['bytes']:>7.1%} "
+              f"{result['seconds']:>10.2f}s {result['seconds'] / args.charts * 1000:>8.1f}ms")
+
+if __name__ == '__main__':
+    main()
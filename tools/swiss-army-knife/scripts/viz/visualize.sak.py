@@ -1,38 +1,40 @@
 import argparse
 import json
+import sys
 from pathlib import Path
 import pandas as pd
-from typing import List, Tuple
-import matplotlib.pyplot as plt
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+import sak_instrument
+from sak_instrument import span
 
 try:
     import viz_insights
-    import viz_static
-    import viz_interactive
+    import viz_render
+    import viz_batch
+    import viz_cache
     MODULES_AVAILABLE = True
 except ImportError:
     MODULES_AVAILABLE = False
 
-def load_data(file_path: str) -> pd.DataFrame:
+def load_data(file_path: str, cache=None) -> pd.DataFrame:
+    if cache:
+        df = cache.load_frame(file_path)
+        if df is not None:
+            return df
+
     path = Path(file_path)
-    if path.suffix == '.csv':
-        return pd.read_csv(path)
-    elif path.suffix == '.json':
-        return pd.read_json(path)
-    else:
-        raise ValueError(f"Unsupported format: {path.suffix}")
-
-def parse_subplots(subplot_str: str) -> List[Tuple[str, dict]]:
-    subplots = []
-    for plot_config in subplot_str.split('|'):
-        parts = plot_config.split(';')
-        plot_type = parts[0]
-        params = {}
-        for param in parts[1:]:
-            key, value = param.split('=')
-            params[key] = value
-        subplots.append((plot_type, params))
-    return subplots
+    with span('load'):
+        if path.suffix == '.csv':
+            df = pd.read_csv(path)
+        elif path.suffix == '.json':
+            df = pd.read_json(path)
+        else:
+            raise ValueError(f"Unsupported format: {path.suffix}")
+
+    if cache:
+        cache.store_frame(file_path, df)
+    return df
 
 def main():
     parser = argparse.ArgumentParser()
@@ -52,7 +54,17 @@ def main():
     parser.add_argument('--layout', help='Subplot layout (rows,cols)')
     parser.add_argument('--insights', action='store_true', help='Generate data insights')
     parser.add_argument('--interactive', action='store_true', help='Create interactive HTML plot')
-    
+    parser.add_argument('--html-mode', choices=['full', 'lean'], default='full',
+                        help='Interactive HTML output: full (self-contained) or lean (shared plotly.js, typed arrays)')
+    parser.add_argument('--plotly-asset', help='Directory for the shared plotly.js used by lean HTML (default: output directory)')
+    parser.add_argument('--gzip', action='store_true', help='Also write gzip-precompressed copies of lean HTML output')
+    parser.add_argument('--batch', help='Render every chart in a JSON/YAML manifest from one data load')
+    parser.add_argument('--workers', type=int, help='Worker processes for --batch (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-parse and re-render')
+    parser.add_argument('--cache-dir', help='Render cache directory (default: $SAK_VIZ_CACHE or ~/.cache/sak-viz)')
+    parser.add_argument('--cache-size', type=int, help='Render cache size limit in MB (default: 512)')
+    sak_instrument.add_arguments(parser)
+
     args = parser.parse_args()
     
     if args.info:
@@ -68,56 +80,99 @@ def main():
         - Stacked charts with --stacked
         - Data insights with --insights
         - Interactive plots with --interactive
+        - Lean HTML with a shared plotly.js and typed arrays via --html-mode lean [--gzip]
+        - Batch rendering from a manifest with --batch and --workers
+        - Unchanged charts served from an on-disk cache (disable with --no-cache)
+        - --timings prints load/render/cache phase times; --profile FILE writes a cProfile dump
         
         Examples:
           swiss-army-knife visualize data.csv viz --interactive --insights \\
             --subplots "scatter;x=x;y=y|bar;x=category;y=value"
+          swiss-army-knife visualize data.csv --batch charts.yaml --workers 4
         """)
         return
 
+    with sak_instrument.instrument(args):
+        run(args, parser)
+
+def run(args, parser):
+    cache = None
+    if MODULES_AVAILABLE and not args.no_cache:
+        cache_mb = viz_cache.DEFAULT_CACHE_MB if args.cache_size is None else args.cache_size
+        cache = viz_cache.RenderCache(args.cache_dir, cache_mb * 1024 * 1024)
+
+    if args.batch and MODULES_AVAILABLE:
+        manifest_input, specs = viz_batch.load_manifest(args.batch)
+        input_file = args.input or manifest_input
+        if not input_file:
+            print("Error: No input file given on the command line or in the manifest")
+            return
+
+        results = [None] * len(specs)
+        keys = [cache.render_key(input_file, spec) if cache else None for spec in specs]
+        with span('cache'):
+            for i, spec in enumerate(specs):
+                if cache and cache.fetch(keys[i], viz_render.output_paths(spec)):
+                    viz_render.prepare_assets(spec)
+                    results[i] = (str(viz_render.output_path(spec)), None)
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            df = load_data(input_file, cache)
+            with span('render'):
+                rendered = viz_batch.run_batch(df, [specs[i] for i in pending], args.workers)
+            with span('cache'):
+                for i, result in zip(pending, rendered):
+                    results[i] = result
+                    if cache and not result[1]:
+                        cache.store(keys[i], viz_render.output_paths(specs[i]))
+
+        failed = 0
+        for i, (spec, (output, error)) in enumerate(zip(specs, results)):
+            if error:
+                failed += 1
+                print(f"Failed to create {spec.get('output')}: {error}")
+            elif i not in pending:
+                print(f"Created visualization: {output} (cached)")
+            else:
+                print(f"Created visualization: {output}")
+        print(f"Rendered {len(pending) - failed} of {len(specs)} charts, {len(specs) - len(pending)} from cache")
+        return
+
     if not args.input or not args.output or not MODULES_AVAILABLE:
         parser.print_help()
         return
 
-    df = load_data(args.input)
-    
+    df = None
     if args.insights:
-        insights = viz_insights.analyze_data(df)
+        df = load_data(args.input, cache)
+        with span('insights'):
+            insights = viz_insights.analyze_data(df)
         insight_file = Path(args.output).with_suffix('.insights.json')
         with open(insight_file, 'w') as f:
             json.dump(insights, f, indent=2)
         print(f"Generated insights: {insight_file}")
-    
+
+    spec = viz_render.spec_from_args(args)
+    key = cache.render_key(args.input, spec) if cache else None
+    with span('cache'):
+        hit = cache is not None and cache.fetch(key, viz_render.output_paths(spec))
+    if hit:
+        viz_render.prepare_assets(spec)
+        output, cached = viz_render.output_path(spec), ' (cached)'
+    else:
+        if df is None:
+            df = load_data(args.input, cache)
+        with span('render'):
+            output, cached = viz_render.render_chart(df, spec), ''
+        if cache:
+            with span('cache'):
+                cache.store(key, viz_render.output_paths(spec))
+
     if args.interactive:
-        output_html = Path(args.output).with_suffix('.html')
-        
-        if args.subplots:
-            subplots = parse_subplots(args.subplots)
-            layout = tuple(map(int, args.layout.split(','))) if args.layout else (len(subplots), 1)
-            fig = viz_interactive.create_interactive_subplots(df, subplots, layout)
-        else:
-            fig = viz_interactive.create_interactive_plot(df, args.type, args.x, args.y, args.hue, 
-                                                       args.title, args.kind, args.stacked)
-        
-        fig.write_html(output_html)
-        print(f"Created interactive visualization: {output_html}")
+        print(f"Created interactive visualization: {output}{cached}")
     else:
-        figsize = (10, 6)
-        if args.figsize:
-            width, height = map(float, args.figsize.split(','))
-            figsize = (width, height)
-
-        if args.subplots:
-            subplots = parse_subplots(args.subplots)
-            layout = tuple(map(int, args.layout.split(','))) if args.layout else (len(subplots), 1)
-            fig = viz_static.create_multi_plot(df, subplots, layout, figsize, args.palette)
-        else:
-            fig = plt.figure(figsize=figsize)
-            viz_static.create_subplot(fig, '111', df, args.type, args.x, args.y, args.hue, 
-                                    args.title, args.kind, args.stacked, args.palette)
-        
-        plt.savefig(args.output, bbox_inches='tight', dpi=300)
-        print(f"Created visualization: {args.output}")
+        print(f"Created visualization: {output}{cached}")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import json
+import mmap
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+import viz_render
+
+# Column buffers are aligned so NumPy can view them without copying
+_ALIGNMENT = 64
+
+class SharedFrame(NamedTuple):
+    """A DataFrame laid out in a memory-mapped file that worker processes can attach to."""
+    path: str
+    header: bytes
+    buffers: Tuple[Tuple[int, int], ...]
+
+def load_manifest(manifest_path: str) -> Tuple[Optional[str], List[Dict]]:
+    """Read a JSON or YAML manifest and return (input file, chart specs).
+
+    The manifest is either a list of chart specs or a mapping with a
+    'charts' list and an optional 'input' data file.
+    """
+    path = Path(manifest_path)
+    with open(path) as f:
+        if path.suffix in ('.yaml', '.yml'):
+            import yaml
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+
+    if isinstance(manifest, list):
+        return None, manifest
+    return manifest.get('input'), manifest.get('charts', [])
+
+def share_frame(df: pd.DataFrame, directory: Optional[str] = None) -> SharedFrame:
+    """Write the DataFrame's column buffers to a memory-mappable file.
+
+    Uses pickle protocol 5 so numeric blocks are exported out-of-band; only
+    the small pickle header (index, dtypes and any object columns) is sent
+    to each worker.
+    """
+    buffers = []
+    header = pickle.dumps(df, protocol=5, buffer_callback=buffers.append)
+
+    fd, path = tempfile.mkstemp(prefix='viz-frame-', suffix='.bin', dir=directory)
+    layout = []
+    offset = 0
+    with os.fdopen(fd, 'wb') as f:
+        for buffer in buffers:
+            raw = buffer.raw()
+            padding = -offset % _ALIGNMENT
+            f.write(b'\0' * padding)
+            offset += padding
+            f.write(raw)
+            layout.append((offset, raw.nbytes))
+            offset += raw.nbytes
+    return SharedFrame(path, header, tuple(layout))
+
+def attach_frame(shared: SharedFrame) -> pd.DataFrame:
+    """Rebuild a shared DataFrame as read-only views over the mapped file."""
+    if not shared.buffers:
+        return pickle.loads(shared.header)
+    with open(shared.path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    return pickle.loads(shared.header, buffers=[view[start:start + size] for start, size in shared.buffers])
+
+_worker_df = None
+
+def _init_worker(shared: SharedFrame) -> None:
+    global _worker_df
+    import matplotlib
+    matplotlib.use('Agg')
+    _worker_df = attach_frame(shared)
+
+def _render_in_worker(spec: Dict) -> Tuple[Optional[str], Optional[str]]:
+    try:
+        return viz_render.render_chart(_worker_df, spec), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def run_batch(df: pd.DataFrame, specs: List[Dict], workers: Optional[int] = None) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Render every spec against one shared copy of the data.
+
+    Returns (output path, error) pairs in manifest order; a failing chart
+    does not stop the rest of the batch.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(specs))
+    if workers <= 1:
+        results = []
+        for spec in specs:
+            try:
+                results.append((viz_render.render_chart(df, spec), None))
+            except Exception as e:
+                results.append((None, f"{type(e).__name__}: {e}"))
+        return results
+
+    shared = share_frame(df)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared,)) as executor:
+            return list(executor.map(_render_in_worker, specs))
+    finally:
+        os.unlink(shared.path)
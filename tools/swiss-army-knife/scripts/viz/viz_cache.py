@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+import viz_render
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('SAK_VIZ_CACHE', Path.home() / '.cache' / 'sak-viz'))
+DEFAULT_CACHE_MB = 512
+
+# Bump when rendering output changes so stale entries are not reused
+CACHE_VERSION = 1
+
+class RenderCache:
+    """On-disk cache of rendered charts and parsed DataFrames.
+
+    Renders are keyed by the SHA-256 of the input file plus the normalized
+    chart spec (and, for lean HTML, the plotly.js link it embeds); parsed inputs are kept as Feather sidecars keyed by the same
+    content hash. Least recently used entries are evicted once the cache
+    grows past max_bytes.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_CACHE_MB * 1024 * 1024):
+        self.directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.renders_dir = self.directory / 'renders'
+        self.frames_dir = self.directory / 'frames'
+        self.renders_dir.mkdir(parents=True, exist_ok=True)
+        self.frames_dir.mkdir(parents=True, exist_ok=True)
+        self._hashes = {}
+
+    def file_hash(self, file_path: str) -> str:
+        path = str(Path(file_path).resolve())
+        if path not in self._hashes:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            self._hashes[path] = digest.hexdigest()
+        return self._hashes[path]
+
+    def render_key(self, input_file: str, spec: Dict) -> str:
+        normalized = {}
+        for key, value in spec.items():
+            if key == 'output' or value is None or value is False or value == '':
+                continue
+            if key == 'html_mode' and value == 'full':
+                continue
+            if isinstance(value, (list, tuple)) and key in ('figsize', 'layout'):
+                value = ','.join(str(v) for v in value)
+            normalized[key] = value
+        normalized['format'] = viz_render.output_path(spec).suffix.lower()
+        # Lean HTML links plotly.js relative to the output and by version, so the link is part of the render
+        src = viz_render.asset_src(spec)
+        if src:
+            normalized['plotly_src'] = src
+
+        payload = json.dumps({'version': CACHE_VERSION, 'input': self.file_hash(input_file),
+                              'spec': normalized}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def fetch(self, key: str, outputs: List[Path]) -> bool:
+        """Copy cached renders to outputs; returns False unless all of them are cached."""
+        cached = [self._render_path(key, i, output) for i, output in enumerate(outputs)]
+        if not all(path.exists() for path in cached):
+            return False
+        for path, output in zip(cached, outputs):
+            shutil.copyfile(path, output)
+            os.utime(path)
+        return True
+
+    def store(self, key: str, outputs: List[Path]) -> None:
+        for i, output in enumerate(outputs):
+            self._store_file(Path(output), self._render_path(key, i, output))
+        self.evict()
+
+    def load_frame(self, input_file: str) -> Optional[pd.DataFrame]:
+        sidecar = self._frame_path(input_file)
+        if not sidecar.exists():
+            return None
+        try:
+            df = pd.read_feather(sidecar)
+        except (ImportError, OSError, ValueError):
+            return None
+        os.utime(sidecar)
+        return df
+
+    def store_frame(self, input_file: str, df: pd.DataFrame) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.frames_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            df.to_feather(tmp)
+            os.replace(tmp, self._frame_path(input_file))
+        except (ImportError, TypeError, ValueError):
+            # pyarrow missing, or a frame Feather can't hold (non-default index, non-string columns)
+            os.unlink(tmp)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for directory in (self.renders_dir, self.frames_dir):
+            for path in directory.iterdir():
+                if path.suffix == '.tmp':
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _render_path(self, key: str, index: int, output: Path) -> Path:
+        return self.renders_dir / f"{key}.{index}{Path(output).suffix}"
+
+    def _frame_path(self, input_file: str) -> Path:
+        suffix = Path(input_file).suffix.lstrip('.')
+        return self.frames_dir / f"{self.file_hash(input_file)}.{suffix}.feather"
+
+    def _store_file(self, source: Path, target: Path) -> None:
+        fd, tmp = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+        os.close(fd)
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, target)
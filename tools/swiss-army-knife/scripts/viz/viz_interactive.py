@@ -1,9 +1,23 @@
+import plotly
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
+import base64
+import gzip
+import os
+import tempfile
+import numpy as np
 import pandas as pd
+from pathlib import Path
 from typing import List, Tuple, Optional
 
+# plotly.js decodes base64 typed arrays ({'dtype', 'bdata'}) from 2.28.0 on
+TYPED_ARRAY_PLOTLYJS = (2, 28)
+# Short arrays stay as JSON lists; base64 only pays off on longer ones
+MIN_TYPED_ARRAY = 16
+_INT_DTYPES = ('i1', 'u1', 'i2', 'u2', 'i4', 'u4')
+
 def create_interactive_plot(df: pd.DataFrame, plot_type: str, x: str, y: Optional[str] = None,
                           hue: Optional[str] = None, title: Optional[str] = None,
                           kind: Optional[str] = None, stacked: bool = False) -> go.Figure:
@@ -58,4 +72,98 @@ def create_interactive_subplots(df: pd.DataFrame, subplots: List[Tuple[str, dict
             fig.add_trace(trace, row=row, col=col)
     
     fig.update_layout(height=400*rows, showlegend=True, template='plotly_white')
-    return fig
\ No newline at end of file
+    return fig
+
+def _typed_array(values) -> Optional[dict]:
+    try:
+        array = np.asarray(values)
+    except (TypeError, ValueError):
+        return None
+    if array.size < MIN_TYPED_ARRAY or array.ndim > 2 or array.dtype.kind not in 'iuf':
+        return None
+
+    dtype = 'f8'
+    if array.dtype.kind in 'iu':
+        low, high = array.min(), array.max()
+        for candidate in _INT_DTYPES:
+            info = np.iinfo(candidate)
+            if info.min <= low and high <= info.max:
+                dtype = candidate
+                break
+
+    encoded = {'dtype': dtype,
+               'bdata': base64.b64encode(np.ascontiguousarray(array, dtype='<' + dtype).tobytes()).decode('ascii')}
+    if array.ndim == 2:
+        encoded['shape'] = f"{array.shape[0]},{array.shape[1]}"
+    return encoded
+
+def encode_typed_arrays(value):
+    """Replace numeric arrays in a trace dict with base64 typed array specs."""
+    if isinstance(value, dict):
+        return {key: encode_typed_arrays(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)) and len(value):
+        if isinstance(value, np.ndarray) or not isinstance(value[0], (str, bool, dict)):
+            encoded = _typed_array(value)
+            if encoded is not None:
+                return encoded
+        if isinstance(value, np.ndarray):
+            return value
+        return [encode_typed_arrays(item) for item in value]
+    return value
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    # mkstemp creates files as 0600; published pages need to be world-readable
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+def _gzip_bytes(data: bytes) -> bytes:
+    # mtime=0 keeps the output byte-identical across runs
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def plotlyjs_asset(asset_dir: Path) -> Path:
+    return Path(asset_dir) / f"plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+
+def plotlyjs_src(output: Path, asset_dir: Optional[Path] = None) -> str:
+    """The script src lean HTML at output uses for the shared plotly.js asset."""
+    output = Path(output)
+    asset = plotlyjs_asset(asset_dir if asset_dir else output.parent)
+    return Path(os.path.relpath(asset, output.parent)).as_posix()
+
+def shared_plotlyjs(asset_dir: Path, compress: bool = False) -> Path:
+    """Write plotly.min.js once per plotly.js version and return its path."""
+    asset_dir = Path(asset_dir)
+    asset_dir.mkdir(parents=True, exist_ok=True)
+    asset = plotlyjs_asset(asset_dir)
+    if not asset.exists():
+        _write_atomic(asset, plotly.offline.get_plotlyjs().encode('utf-8'))
+    if compress and not asset.with_name(asset.name + '.gz').exists():
+        _write_atomic(asset.with_name(asset.name + '.gz'), _gzip_bytes(asset.read_bytes()))
+    return asset
+
+def write_lean_html(fig: go.Figure, output: Path, asset_dir: Optional[Path] = None,
+                    compress: bool = False) -> List[Path]:
+    """Write HTML that loads a shared plotly.js asset and carries trace data as typed arrays.
+
+    The asset goes to asset_dir (default: next to the output) and is referenced by a
+    relative path. With compress, a gzip-precompressed copy is written beside each
+    file. Returns the files written for this figure.
+    """
+    output = Path(output)
+    shared_plotlyjs(asset_dir if asset_dir else output.parent, compress)
+    src = plotlyjs_src(output, asset_dir)
+
+    fig_dict = fig.to_plotly_json()
+    version = tuple(int(part) for part in plotly.offline.get_plotlyjs_version().split('.')[:2])
+    if version >= TYPED_ARRAY_PLOTLYJS:
+        fig_dict['data'] = [encode_typed_arrays(trace) for trace in fig_dict['data']]
+
+    html = pio.to_html(fig_dict, include_plotlyjs=src, full_html=True, validate=False).encode('utf-8')
+    _write_atomic(output, html)
+    written = [output]
+    if compress:
+        written.append(output.with_name(output.name + '.gz'))
+        _write_atomic(written[-1], _gzip_bytes(html))
+    return written
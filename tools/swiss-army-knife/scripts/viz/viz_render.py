@@ -0,0 +1,113 @@
+import matplotlib.pyplot as plt
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import viz_static
+import viz_interactive
+
+# Chart options shared by the command line and batch manifests
+SPEC_KEYS = ('output', 'type', 'x', 'y', 'hue', 'title', 'figsize', 'kind', 'stacked',
+             'palette', 'subplots', 'layout', 'interactive', 'html_mode', 'plotly_asset', 'gzip')
+
+def parse_subplots(subplot_str: str) -> List[Tuple[str, dict]]:
+    subplots = []
+    for plot_config in subplot_str.split('|'):
+        parts = plot_config.split(';')
+        plot_type = parts[0]
+        params = {}
+        for param in parts[1:]:
+            key, value = param.split('=')
+            params[key] = value
+        subplots.append((plot_type, params))
+    return subplots
+
+def normalize_subplots(subplots) -> List[Tuple[str, dict]]:
+    """Accept the CLI subplot string or a manifest list of {'type': ..., ...} dicts."""
+    if isinstance(subplots, str):
+        return parse_subplots(subplots)
+    normalized = []
+    for entry in subplots:
+        params = dict(entry)
+        normalized.append((params.pop('type'), params))
+    return normalized
+
+def spec_from_args(args) -> Dict:
+    return {key: getattr(args, key) for key in SPEC_KEYS if getattr(args, key, None) is not None}
+
+def output_path(spec: Dict) -> Path:
+    output = Path(spec['output'])
+    return output.with_suffix('.html') if spec.get('interactive') else output
+
+def _is_lean(spec: Dict) -> bool:
+    return bool(spec.get('interactive')) and spec.get('html_mode') == 'lean'
+
+def output_paths(spec: Dict) -> List[Path]:
+    """All files a spec produces, excluding the shared plotly.js asset."""
+    output = output_path(spec)
+    if _is_lean(spec) and spec.get('gzip'):
+        return [output, output.with_name(output.name + '.gz')]
+    return [output]
+
+def asset_src(spec: Dict) -> Optional[str]:
+    """The plotly.js src embedded in a lean HTML output (relative, versioned); None otherwise."""
+    if not _is_lean(spec):
+        return None
+    return viz_interactive.plotlyjs_src(output_path(spec), spec.get('plotly_asset'))
+
+def prepare_assets(spec: Dict) -> None:
+    """Make sure shared assets referenced by a spec's output exist."""
+    if _is_lean(spec):
+        viz_interactive.shared_plotlyjs(spec.get('plotly_asset') or output_path(spec).parent,
+                                        bool(spec.get('gzip')))
+
+def _layout(spec: Dict, subplots: List[Tuple[str, dict]]) -> Tuple[int, int]:
+    layout = spec.get('layout')
+    if not layout:
+        return (len(subplots), 1)
+    if isinstance(layout, str):
+        layout = layout.split(',')
+    return tuple(map(int, layout))
+
+def _figsize(spec: Dict) -> tuple:
+    figsize = spec.get('figsize')
+    if not figsize:
+        return (10, 6)
+    if isinstance(figsize, str):
+        figsize = figsize.split(',')
+    width, height = map(float, figsize)
+    return (width, height)
+
+def render_chart(df: pd.DataFrame, spec: Dict) -> str:
+    """Render one chart spec to its output file and return the written path."""
+    output = output_path(spec)
+
+    if spec.get('interactive'):
+        if spec.get('subplots'):
+            subplots = normalize_subplots(spec['subplots'])
+            fig = viz_interactive.create_interactive_subplots(df, subplots, _layout(spec, subplots))
+        else:
+            fig = viz_interactive.create_interactive_plot(df, spec.get('type'), spec.get('x'),
+                                                          spec.get('y'), spec.get('hue'),
+                                                          spec.get('title'), spec.get('kind'),
+                                                          spec.get('stacked', False))
+        if _is_lean(spec):
+            viz_interactive.write_lean_html(fig, output, spec.get('plotly_asset'), bool(spec.get('gzip')))
+        else:
+            fig.write_html(output)
+    else:
+        figsize = _figsize(spec)
+        if spec.get('subplots'):
+            subplots = normalize_subplots(spec['subplots'])
+            fig = viz_static.create_multi_plot(df, subplots, _layout(spec, subplots), figsize,
+                                               spec.get('palette'))
+        else:
+            fig = plt.figure(figsize=figsize)
+            viz_static.create_subplot(fig, '111', df, spec.get('type'), spec.get('x'), spec.get('y'),
+                                      spec.get('hue'), spec.get('title'), spec.get('kind'),
+                                      spec.get('stacked', False), spec.get('palette'))
+
+        fig.savefig(output, bbox_inches='tight', dpi=300)
+        plt.close(fig)
+
+    return str(output)
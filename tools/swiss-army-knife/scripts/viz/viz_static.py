@@ -9,7 +9,7 @@ def create_subplot(fig: plt.Figure, subplot_spec: str, df: pd.DataFrame,
                   hue: Optional[str] = None, title: Optional[str] = None,
                   kind: Optional[str] = None, stacked: bool = False,
                   palette: Optional[str] = None) -> None:
-    ax = fig.add_subplot(subplot_spec)
+    ax = fig.add_subplot(int(subplot_spec))
     
     if palette:
         sns.set_palette(palette)
@@ -49,7 +49,7 @@ def create_subplot(fig: plt.Figure, subplot_spec: str, df: pd.DataFrame,
             df.plot(kind='area', x=x, y=y, ax=ax)
         ax.grid(True)
     elif plot_type == 'radar':
-        ax = plt.subplot(subplot_spec, projection='polar')
+        ax = plt.subplot(int(subplot_spec), projection='polar')
         categories = df[x].tolist()
         values = df[y].tolist()
         angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False)
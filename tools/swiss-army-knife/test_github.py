@@ -0,0 +1,258 @@
+import base64
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+
+import github_api
+from github_api import GitHubClient, GitHubError
+
+_spec = importlib.util.spec_from_file_location('github_sak', Path(__file__).with_name('github.sak.py'))
+github = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(github)
+
+WORKERS = 4
+
+class MockGitData(ThreadingHTTPServer):
+    """An in-memory repository behind the Git Data API endpoints batch_commit uses.
+
+    Trees are flat {path: (mode, sha)} maps. failures maps an endpoint
+    ('blobs', 'trees', 'commits') to statuses returned by its next requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, files):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.lock = threading.Lock()
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.requests = []
+        self.failures = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        entries = {path: ('100644', self.add_blob(content)) for path, content in files.items()}
+        self.head = self.add_commit('initial', self.add_tree(entries), [])
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def add_blob(self, content):
+        sha = github.blob_sha(content)
+        self.blobs[sha] = content
+        return sha
+
+    def add_tree(self, entries):
+        sha = hashlib.sha1(json.dumps(sorted(entries.items())).encode()).hexdigest()
+        self.trees[sha] = entries
+        return sha
+
+    def add_commit(self, message, tree, parents):
+        sha = hashlib.sha1(json.dumps([message, tree, parents]).encode()).hexdigest()
+        self.commits[sha] = {'sha': sha, 'message': message, 'tree': {'sha': tree}, 'parents': parents}
+        return sha
+
+    def files(self):
+        """{path: (mode, content)} at the branch head."""
+        tree = self.trees[self.commits[self.head]['tree']['sha']]
+        return {path: (mode, self.blobs[sha]) for path, (mode, sha) in tree.items()}
+
+    def posts(self, endpoint):
+        return [path for method, path in self.requests if method == 'POST' and path.endswith(f'/git/{endpoint}')]
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.handle_request(None)
+
+    def do_POST(self):
+        self.handle_request(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+
+    do_PATCH = do_POST
+
+    def handle_request(self, data):
+        server = self.server
+        path = urlsplit(self.path).path
+        parts = path.strip('/').split('/')[3:]
+        with server.lock:
+            server.requests.append((self.command, path))
+            failures = server.failures.get(parts[-1], []) if self.command == 'POST' else []
+            status = failures.pop(0) if failures else None
+            if parts == ['git', 'blobs']:
+                server.in_flight += 1
+                server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if parts == ['git', 'blobs']:
+                # Long enough for concurrent uploads to overlap
+                time.sleep(0.02)
+            if status:
+                return self.send(status, {'message': 'Service Unavailable'})
+            with server.lock:
+                self.send(*self.route(parts, data))
+        finally:
+            if parts == ['git', 'blobs']:
+                with server.lock:
+                    server.in_flight -= 1
+
+    def route(self, parts, data):
+        server = self.server
+        if self.command == 'GET' and not parts:
+            return 200, {'default_branch': 'main'}
+        if self.command == 'GET' and parts == ['git', 'ref', 'heads', 'main']:
+            return 200, {'object': {'sha': server.head}}
+        if self.command == 'GET' and parts[:2] == ['git', 'commits']:
+            return 200, server.commits[parts[2]]
+        if self.command == 'GET' and parts[:2] == ['git', 'trees']:
+            entries = []
+            for path, (mode, sha) in sorted(server.trees[parts[2]].items()):
+                if '/' in path:
+                    entries.append({'path': path.rsplit('/', 1)[0], 'mode': '040000', 'type': 'tree', 'sha': 't'})
+                entries.append({'path': path, 'mode': mode, 'type': 'blob', 'sha': sha})
+            return 200, {'sha': parts[2], 'tree': entries}
+        if parts == ['git', 'blobs']:
+            return 201, {'sha': server.add_blob(base64.b64decode(data['content']))}
+        if parts == ['git', 'trees']:
+            entries = dict(server.trees[data['base_tree']])
+            for entry in data['tree']:
+                assert entry['sha'] in server.blobs, f"tree references missing blob for {entry['path']}"
+                entries[entry['path']] = (entry['mode'], entry['sha'])
+            return 201, {'sha': server.add_tree(entries)}
+        if parts == ['git', 'commits']:
+            return 201, server.commits[server.add_commit(data['message'], data['tree'], data['parents'])]
+        if self.command == 'PATCH' and parts == ['git', 'refs', 'heads', 'main']:
+            server.head = data['sha']
+            return 200, {'object': {'sha': server.head}}
+        return 404, {'message': 'Not Found'}
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    monkeypatch.setattr(github_api, 'BACKOFF_BASE', 0.001)
+    servers = []
+
+    def start(files):
+        server = MockGitData(files)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def _commit(server, files, message='batch'):
+    with GitHubClient(server.url, cache_dir=None, max_connections=WORKERS) as client:
+        commit = github.batch_commit(client, 'octo', 'site', files, message, workers=WORKERS)
+        return commit, client.stats
+
+def _project(root, count=20):
+    for n in range(count):
+        path = root / f'pkg{n % 3}' / f'mod{n}.py'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f'VALUE = {n}\n')
+    (root / 'same.txt').write_text('shared\n')
+    (root / 'copy.txt').write_text('shared\n')
+    (root / 'README.md').write_text('# site\n')
+    (root / 'run.sh').write_text('#!/bin/sh\n')
+    os.chmod(root / 'run.sh', 0o755)
+    return github.collect_files(str(root))
+
+def test_batch_commit_is_one_tree_and_one_commit(mock_api, tmp_path):
+    server = mock_api({'README.md': b'# site\n', 'old.txt': b'kept\n'})
+    initial = server.head
+    files = _project(tmp_path)
+
+    commit, stats = _commit(server, files)
+
+    assert commit['parents'] == [initial]
+    assert commit['stats'] == {'files': 24, 'changed': 23, 'uploaded': 22, 'reused': 0}
+    # README.md's blob exists remotely; copy.txt and same.txt share one upload
+    assert len(server.posts('blobs')) == 22
+    assert len(server.posts('trees')) == 1
+    assert len(server.posts('commits')) == 1
+    assert [method for method, _ in server.requests].count('PATCH') == 1
+    assert 1 < server.max_in_flight <= WORKERS
+    assert stats['retries'] == 0
+
+    tree = server.files()
+    assert tree['old.txt'] == ('100644', b'kept\n')
+    assert tree['pkg1/mod4.py'] == ('100644', b'VALUE = 4\n')
+    if os.name != 'nt':
+        assert tree['run.sh'] == ('100755', b'#!/bin/sh\n')
+
+def test_unchanged_files_make_no_commit(mock_api, tmp_path):
+    server = mock_api({})
+    files = _project(tmp_path)
+    _commit(server, files)
+    head = server.head
+    del server.requests[:]
+
+    commit, _ = _commit(server, github.collect_files(str(tmp_path)))
+    assert commit is None
+    assert server.head == head
+    assert all(method == 'GET' for method, _ in server.requests)
+
+def test_existing_blobs_are_reused_for_new_paths(mock_api, tmp_path):
+    server = mock_api({'a.txt': b'one\n'})
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps([{'path': 'b.txt', 'content': 'one\n'}, {'path': 'c.txt', 'content': 'two\n'}]))
+
+    commit, _ = _commit(server, github.collect_files(manifest=str(manifest), prefix='docs'))
+    assert commit['stats'] == {'files': 2, 'changed': 2, 'uploaded': 1, 'reused': 1}
+    assert server.files() == {'a.txt': ('100644', b'one\n'), 'docs/b.txt': ('100644', b'one\n'),
+                              'docs/c.txt': ('100644', b'two\n')}
+
+@pytest.mark.skipif(os.name == 'nt', reason='no execute bit on Windows')
+def test_mode_change_alone_is_committed(mock_api, tmp_path):
+    server = mock_api({})
+    files = _project(tmp_path)
+    _commit(server, files)
+    os.chmod(tmp_path / 'README.md', 0o755)
+
+    commit, _ = _commit(server, github.collect_files(str(tmp_path)))
+    assert commit['stats'] == {'files': 24, 'changed': 1, 'uploaded': 0, 'reused': 1}
+    assert server.files()['README.md'] == ('100755', b'# site\n')
+
+def test_transient_failures_are_retried(mock_api, tmp_path):
+    server = mock_api({})
+    server.failures = {'blobs': [503] * 5, 'trees': [502]}
+    files = _project(tmp_path)
+
+    commit, stats = _commit(server, files)
+    assert commit['stats']['uploaded'] == 23
+    assert stats['retries'] == 6
+    assert len(server.posts('blobs')) == 23 + 5
+    assert len(server.posts('commits')) == 1
+    assert set(server.files()) == {file.path for file in files}
+
+def test_failed_commit_is_not_retried(mock_api, tmp_path):
+    server = mock_api({})
+    head = server.head
+    server.failures = {'commits': [502]}
+
+    with pytest.raises(GitHubError) as error:
+        _commit(server, _project(tmp_path))
+    assert error.value.status == 502
+    # Creating a commit isn't idempotent, so it is neither retried nor followed by a ref update
+    assert len(server.posts('commits')) == 1
+    assert server.head == head
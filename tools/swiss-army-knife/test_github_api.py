@@ -0,0 +1,201 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+import github_api
+from github_api import GitHubClient, GitHubError
+
+PAGES = 5
+REPOS = [{'name': f'repo{n}', 'full_name': f'octo/repo{n}', 'description': None} for n in range(PAGES * 3)]
+
+class StandIn(ThreadingHTTPServer):
+    """A local stand-in for the REST API: /users/octo/repos in pages of three, with ETags.
+
+    rate_limited lists paths answered once with 429 and Retry-After; errors
+    maps a path to a status returned on every request to it.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, links='last'):
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.links = links
+        self.lock = threading.Lock()
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.rate_limited = set()
+        self.errors = {}
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/api/v3'
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, data=None, headers=()):
+        body = json.dumps(data).encode() if data is not None else b''
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.handle_request()
+
+    def handle_request(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        with server.lock:
+            server.requests.append((self.command, self.path, self.headers.get('If-None-Match')))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            rate_limited = parts.path in server.rate_limited
+            server.rate_limited.discard(parts.path)
+        try:
+            # Long enough for concurrent page requests to overlap
+            time.sleep(0.05)
+            if rate_limited:
+                return self.send(429, {'message': 'secondary rate limit'}, [('Retry-After', '2')])
+            if parts.path in server.errors:
+                return self.send(server.errors[parts.path], {'message': 'unavailable'})
+            if parts.path != '/api/v3/users/octo/repos':
+                return self.send(404, {'message': 'Not Found'})
+            self.send_page(int(dict(parse_qsl(parts.query)).get('page', 1)))
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def send_page(self, page):
+        etag = f'"page-{page}"'
+        headers = [('ETag', etag), ('X-RateLimit-Limit', '60'), ('X-RateLimit-Remaining', '59'),
+                   ('X-RateLimit-Reset', str(int(time.time()) + 3600))]
+        links = []
+        if page < PAGES:
+            links.append(f'<{self.server.url}/users/octo/repos?per_page=3&page={page + 1}>; rel="next"')
+            if self.server.links == 'last':
+                links.append(f'<{self.server.url}/users/octo/repos?per_page=3&page={PAGES}>; rel="last"')
+        if links:
+            headers.append(('Link', ', '.join(links)))
+        if self.headers.get('If-None-Match') == etag:
+            return self.send(304, headers=headers)
+        self.send(200, REPOS[(page - 1) * 3:page * 3], headers)
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(**options):
+        server = StandIn(**options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def waits(monkeypatch):
+    # Record rate-limit waits instead of sleeping through them
+    delays = []
+    monkeypatch.setattr(github_api, '_sleep', lambda delay, reason: delays.append(delay))
+    return delays
+
+def _pages(server):
+    return sorted(int(dict(parse_qsl(urlsplit(path).query)).get('page', 1))
+                  for method, path, _ in server.requests if method == 'GET')
+
+def test_paginate_fetches_pages_after_the_first_concurrently(stand_in, tmp_path):
+    server = stand_in()
+    with GitHubClient(server.url, cache_dir=tmp_path) as client:
+        assert client.paginate('/users/octo/repos') == REPOS
+        assert client.stats == {'requests': PAGES, 'not_modified': 0, 'retries': 0}
+        assert client.rate_limit.remaining == 59
+    assert _pages(server) == list(range(1, PAGES + 1))
+    # Pages 2..5 were requested before any of them was answered
+    assert server.max_in_flight == PAGES - 1
+
+def test_paginate_follows_next_links_without_last(stand_in, tmp_path):
+    server = stand_in(links='next')
+    with GitHubClient(server.url, cache_dir=tmp_path) as client:
+        assert client.paginate('/users/octo/repos') == REPOS
+    assert server.max_in_flight == 1
+
+def test_unchanged_pages_are_revalidated_with_etags(stand_in, tmp_path):
+    server = stand_in()
+    with GitHubClient(server.url, token='t', cache_dir=tmp_path) as client:
+        client.paginate('/users/octo/repos')
+    del server.requests[:]
+
+    with GitHubClient(server.url, token='t', cache_dir=tmp_path) as client:
+        assert client.paginate('/users/octo/repos') == REPOS
+        assert client.stats['not_modified'] == PAGES
+    assert all(etag for _, _, etag in server.requests)
+
+    # The cache is per token: another token gets full responses
+    del server.requests[:]
+    with GitHubClient(server.url, token='other', cache_dir=tmp_path) as client:
+        assert client.paginate('/users/octo/repos') == REPOS
+        assert client.stats['not_modified'] == 0
+    assert not any(etag for _, _, etag in server.requests)
+
+def test_retry_after_is_honored(stand_in, tmp_path, waits):
+    server = stand_in()
+    server.rate_limited.add('/api/v3/users/octo/repos')
+    with GitHubClient(server.url, cache_dir=tmp_path) as client:
+        assert client.paginate('/users/octo/repos') == REPOS
+        assert client.stats['retries'] == 1
+    assert waits == [2.0]
+    # The rate-limited page 1 was sent again
+    assert _pages(server) == [1] + list(range(1, PAGES + 1))
+
+def test_server_errors_are_retried_for_gets_only(stand_in, tmp_path, monkeypatch):
+    monkeypatch.setattr(github_api, 'BACKOFF_BASE', 0.001)
+    server = stand_in()
+    server.errors['/api/v3/repos/octo/repo0/issues'] = 502
+    with GitHubClient(server.url, cache_dir=None) as client:
+        with pytest.raises(GitHubError) as error:
+            client.get('/repos/octo/repo0/issues')
+        assert error.value.status == 502
+        assert client.stats['retries'] == github_api.RETRIES
+        del server.requests[:]
+
+        # A POST that failed with a 5xx may have been applied, so it is sent once
+        with pytest.raises(GitHubError):
+            client.post('/repos/octo/repo0/issues', {'title': 'x'})
+        assert len(server.requests) == 1
+        del server.requests[:]
+        with pytest.raises(GitHubError):
+            client.post('/repos/octo/repo0/issues', {'title': 'x'}, idempotent=True)
+        assert len(server.requests) == github_api.RETRIES + 1
+
+def test_list_repos_cli(stand_in, tmp_path):
+    server = stand_in()
+    script = Path(__file__).with_name('github-list-repos.sak.py')
+    command = [sys.executable, str(script), '--username', 'octo', '--api-url', server.url,
+               '--cache-dir', str(tmp_path), '--json']
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    assert [repo['full_name'] for repo in json.loads(result.stdout)] == [repo['full_name'] for repo in REPOS]
+    assert f'{len(REPOS)} repositories' in result.stderr
+
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    assert f'{PAGES} not modified' in result.stderr